@@ -1,3 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
 from django.test import TestCase
+from shared.pagination import CursorPaginator, InvalidCursor
+from .models import TextEntry
+
+
+class HistoryCursorTests(TestCase):
+    """Keyset paging over -created_at, whose values differ only in microseconds"""
+
+    def setUp(self):
+        base = datetime(2025, 1, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+        # Eight entries inside one millisecond, two pairs of them tied exactly
+        offsets = [0, 1, 1, 2, 3, 3, 4, 5]
+        for i, offset in enumerate(offsets):
+            TextEntry.objects.create(original_text=f'entry {i}', created_at=base + timedelta(microseconds=offset))
+        self.ordered = list(TextEntry.objects.order_by('-created_at', 'pk'))
+
+    def walk(self, per_page):
+        paginator = CursorPaginator(TextEntry.objects.all(), per_page)
+        pages = [paginator.page()]
+        while pages[-1].has_next:
+            pages.append(paginator.page(pages[-1].next_cursor))
+        return paginator, pages
+
+    def test_next_pages_cover_every_row_once(self):
+        for per_page in (1, 2, 3):
+            with self.subTest(per_page=per_page):
+                _, pages = self.walk(per_page)
+                self.assertEqual([entry for page in pages for entry in page], self.ordered)
+
+    def test_previous_returns_the_page_before(self):
+        paginator, pages = self.walk(2)
+        for earlier, later in zip(pages, pages[1:]):
+            self.assertEqual(list(paginator.page(later.previous_cursor)), list(earlier))
+        self.assertFalse(paginator.page(pages[1].previous_cursor).has_previous)
+
+    def test_invalid_cursor(self):
+        paginator = CursorPaginator(TextEntry.objects.all(), 2)
+        for cursor in ('garbage', 'eyJkIjogIm4iLCAidiI6IFsieCIsIDFdfQ'):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                paginator.page(cursor)
 
-# Create your tests here.
+    def test_history_total_is_cached_until_an_entry_is_added(self):
+        cache.clear()
+        self.client.get('/history/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/history/')
+        self.assertEqual(response.context['total_entries'], 8)
+        self.client.post('/', {'text': 'new'})
+        self.assertEqual(self.client.get('/history/').context['total_entries'], 9)
@@ -1,7 +1,15 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.core.cache import cache
+from shared.pagination import CursorPaginator, InvalidCursor
 from .models import TextEntry
 
+HISTORY_PAGE_SIZE = 20
+# The total on the history page; COUNT(*) per page view would undo the
+# point of keyset paging, so it is cached and dropped when an entry is added.
+TOTAL_ENTRIES_CACHE_KEY = 'reverser:total_entries'
+TOTAL_ENTRIES_CACHE_TIMEOUT = 60 * 5
+
 def home(request):
     """العرض الرئيسي لإدخال النص وعرض النتائج"""
     reversed_text = ""
@@ -14,6 +22,7 @@ def home(request):
             # إنشاء إدخال جديد في قاعدة البيانات
             text_entry = TextEntry(original_text=original_text)
             text_entry.save()
+            cache.delete(TOTAL_ENTRIES_CACHE_KEY)
             
             reversed_text = text_entry.reversed_text
             messages.success(request, 'تم عكس النص بنجاح!')
@@ -32,11 +41,17 @@ def home(request):
     return render(request, 'reverser/home.html', context)
 
 def history(request):
-    """عرض تاريخ جميع النصوص المعكوسة"""
+    """عرض تاريخ جميع النصوص المعكوسة، صفحة بعد صفحة بمؤشرات"""
     entries = TextEntry.objects.all()
+    paginator = CursorPaginator(entries, HISTORY_PAGE_SIZE)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        page = paginator.page()
     
     context = {
-        'entries': entries,
+        'entries': page,
+        'total_entries': cache.get_or_set(TOTAL_ENTRIES_CACHE_KEY, entries.count, TOTAL_ENTRIES_CACHE_TIMEOUT),
     }
     
     return render(request, 'reverser/history.html', context)
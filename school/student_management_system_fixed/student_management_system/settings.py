@@ -10,11 +10,18 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Modules shared between the projects of this repository live in
+# <repository root>/shared and are imported as shared.<module>.
+REPO_ROOT = BASE_DIR.parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -45,6 +52,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'student_management_system.staticfiles.StaticFilesMiddleware',
+    'students.querybudget.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,12 +68,21 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
+                'django.template.context_processors.i18n',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'students.context_processors.data_version',
+            ],
+            # Compiled templates are kept in memory; the dev autoreloader
+            # resets this loader whenever a template file changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -84,6 +102,41 @@ DATABASES = {
 }
 
 
+# Cache
+# Cached statistics live in 'default'. Point it at a shared backend
+# (Redis/Memcached) when running more than one worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'student-management-system',
+    },
+    # Data-version stamps (students.versioning). Every process must see the
+    # same stamps, management commands included, hence files by default.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'versions',
+    },
+    # Rendered {% cache %} fragments; disabled under DEBUG so that template
+    # edits show up without clearing the cache.
+    'fragments': {
+        'BACKEND': (
+            'django.core.cache.backends.dummy.DummyCache' if DEBUG
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': 'student-management-system-fragments',
+    },
+}
+
+
+# Authentication
+# Permission sets are cached across requests, see teachers.backends.
+
+AUTHENTICATION_BACKENDS = [
+    'teachers.backends.CachedPermissionBackend',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -152,6 +205,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Photo thumbnails, see students.thumbnails
+THUMBNAIL_ROOT = MEDIA_ROOT / 'thumbnails'
+
 # Static files directories
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
@@ -178,6 +234,17 @@ MESSAGE_TAGS = {
 
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed names plus .gz/.br siblings (.br needs
+# the optional brotli package); StaticFilesMiddleware serves them.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'student_management_system.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
 
 
 # Login URLs
@@ -189,3 +256,19 @@ LOGOUT_REDIRECT_URL = '/'
 # CSRF settings
 CSRF_TRUSTED_ORIGINS = ['https://8000-iisnag2nezqzqjtrmewow-77818d6b.manusvm.computer']
 
+
+
+# Rendered PDF reports, cached on disk per data version
+REPORT_CACHE_DIR = BASE_DIR / 'report_cache'
+
+# Monthly archives written by the archive_audit_logs command
+AUDIT_ARCHIVE_DIR = BASE_DIR / 'audit_archive'
+
+# TeacherPermissionLog entries are written in batches by a background
+# thread; set to True to write them inline (tests, management commands).
+TEACHER_AUDIT_SYNC = False
+
+# Views over their @query_budget are logged; QueryBudgetTestRunner turns
+# this on so that they fail the test instead.
+QUERY_BUDGET_STRICT = False
+TEST_RUNNER = 'students.querybudget.QueryBudgetTestRunner'
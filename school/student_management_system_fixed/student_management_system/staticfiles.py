@@ -0,0 +1,160 @@
+"""Fingerprinted, precompressed static files served by the application
+
+collectstatic (through CompressedManifestStaticFilesStorage) writes every
+asset under a content-hashed name plus .gz and, when the optional brotli
+package is installed, .br siblings. StaticFilesMiddleware indexes
+STATIC_ROOT once at startup and serves those files directly, so no separate
+web server is needed for assets. Restart the process after collectstatic.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico', '.eot', '.ttf'}
+# Keep a compressed copy only if it saves at least this fraction
+MIN_COMPRESSION_SAVING = 0.05
+# Precompressed siblings in order of preference: (Content-Encoding, suffix)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+DEFAULT_MAX_AGE = 60
+
+
+def compress_file(path):
+    """Write .gz (and .br) next to path when that makes it smaller"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    for suffix, compressed in variants:
+        if len(compressed) <= len(data) * (1 - MIN_COMPRESSION_SAVING):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also precompresses what it writes
+
+    Names missing from the manifest (for instance a file that was never
+    collected) fall back to the plain name instead of raising, so a missing
+    asset costs a 404 rather than a 500 on every page.
+    """
+
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in names:
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS and self.exists(name):
+                compress_file(self.path(name))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.last_modified = http_date(stat.st_mtime)
+        self.etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.immutable = immutable
+        self.encodings = [
+            (encoding, path + suffix) for encoding, suffix in ENCODINGS if os.path.exists(path + suffix)
+        ]
+
+
+def accepted_encodings(request):
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """Serve STATIC_ROOT from an index built once at startup
+
+    Hashed names from the manifest get far-future immutable caching; other
+    files get a short max-age. A precompressed sibling is chosen by
+    Accept-Encoding. Disabled when STATIC_ROOT has not been collected.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            raise MiddlewareNotUsed
+        self.files = self.build_index(str(root))
+
+    def build_index(self, root):
+        storage = CompressedManifestStaticFilesStorage(location=root)
+        hashed_names = set(storage.hashed_files.values())
+        files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, filename)
+                name = posixpath.join(*os.path.relpath(path, root).split(os.sep))
+                files[self.prefix + name] = StaticFile(path, immutable=name in hashed_names)
+        return files
+
+    def __call__(self, request):
+        static_file = self.files.get(request.path_info)
+        if static_file is None or request.method not in ('GET', 'HEAD'):
+            return self.get_response(request)
+        return self.serve(request, static_file)
+
+    def serve(self, request, static_file):
+        path, encoding = static_file.path, None
+        accepted = accepted_encodings(request)
+        for candidate, candidate_path in static_file.encodings:
+            if candidate in accepted:
+                path, encoding = candidate_path, candidate
+                break
+        # Each encoding is its own representation with its own validator
+        etag = static_file.etag if encoding is None else f'{static_file.etag[:-1]}-{encoding}"'
+
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                open(path, 'rb'),
+                content_type=static_file.content_type,
+                filename=os.path.basename(static_file.path),
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+            response['Last-Modified'] = static_file.last_modified
+        response['ETag'] = etag
+        if static_file.encodings:
+            response['Vary'] = 'Accept-Encoding'
+        if static_file.immutable:
+            response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response['Cache-Control'] = f'public, max-age={DEFAULT_MAX_AGE}'
+        return response
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_fts_index(sender, using, **kwargs):
+    from django.db import connections
+    from .search import install_fts_index
+    install_fts_index(connections[using])
 
 
 class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'students'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(ensure_fts_index, sender=self)
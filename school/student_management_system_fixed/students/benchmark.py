@@ -0,0 +1,147 @@
+"""Latency, query count and peak memory of the main views
+
+run_benchmarks() drives each view through the test client against whatever
+database is current (the benchmark command seeds a throwaway test database),
+and compare() checks the results against a committed baseline.
+"""
+import json
+import shutil
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from teachers.models import Course
+from .models import Student
+from .reports import report_cache_dir
+from .seeding import SEED_EMAIL_DOMAIN, SEED_USER_PREFIX
+
+
+BENCHMARK_REQUESTS = 30
+BENCHMARK_WARMUP = 3
+# Allowed slowdown of p50/p95 latency and growth of peak memory
+BENCHMARK_TOLERANCE = 0.3
+PERCENTILES = {'p50_ms': 50, 'p95_ms': 95, 'p99_ms': 99}
+
+# url(fixture) builds the request path; before() runs ahead of every request
+Scenario = namedtuple('Scenario', ['name', 'url', 'before'], defaults=[None])
+
+
+def clear_report_cache():
+    # Otherwise only the first export_pdf request would render the report
+    shutil.rmtree(report_cache_dir(), ignore_errors=True)
+
+
+SCENARIOS = [
+    Scenario('dashboard', lambda fixture: reverse('dashboard')),
+    Scenario('student_list', lambda fixture: reverse('student_list') + '?page=2&order_by=-age'),
+    Scenario('student_detail', lambda fixture: reverse('student_detail', args=[fixture['student']])),
+    Scenario('export_csv', lambda fixture: reverse('export_csv') + '?year=1'),
+    Scenario('export_pdf', lambda fixture: reverse('export_pdf') + '?year=1', before=clear_report_cache),
+    Scenario('teacher_course_detail', lambda fixture: reverse('teacher_course_detail', args=[fixture['course'].pk])),
+]
+
+
+def benchmark_fixture():
+    """Objects the scenarios point at, picked from seeded rows"""
+    students = Student.objects.filter(email__endswith=SEED_EMAIL_DOMAIN).order_by('student_id')
+    course = (Course.objects.filter(teacher__user__username__startswith=SEED_USER_PREFIX)
+              .select_related('teacher__user').order_by('code').first())
+    if course is None or not students.exists():
+        raise ValueError("No seeded data; run seed_database() first")
+    return {'student': students[students.count() // 2].pk, 'course': course}
+
+
+def fetch(client, url):
+    response = client.get(url)
+    if response.status_code != 200:
+        raise AssertionError(f"GET {url} returned {response.status_code}")
+    # Streaming and file responses do their work while being consumed
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+        response.close()
+    return response
+
+
+def percentile(samples, pct):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def measure(client, scenario, url, requests, warmup):
+    """Timed requests first, then one more under query capture and tracemalloc
+
+    Neither instrument is active while timing, so they do not skew latency.
+    """
+    samples = []
+    for i in range(warmup + requests):
+        if scenario.before:
+            scenario.before()
+        start = time.perf_counter()
+        fetch(client, url)
+        if i >= warmup:
+            samples.append((time.perf_counter() - start) * 1000)
+
+    if scenario.before:
+        scenario.before()
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            fetch(client, url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {name: round(percentile(samples, pct), 2) for name, pct in PERCENTILES.items()}
+    result['queries'] = len(queries)
+    result['peak_kib'] = round(peak / 1024)
+    return result
+
+
+def run_benchmarks(requests=BENCHMARK_REQUESTS, warmup=BENCHMARK_WARMUP, names=None):
+    """{scenario name: metrics} for the selected scenarios (all by default)"""
+    fixture = benchmark_fixture()
+    client = Client()
+    client.force_login(fixture['course'].teacher.user)
+    return {
+        scenario.name: measure(client, scenario, scenario.url(fixture), requests, warmup)
+        for scenario in SCENARIOS if names is None or scenario.name in names
+    }
+
+
+def compare(results, baseline, tolerance=BENCHMARK_TOLERANCE):
+    """Human-readable regressions of results against baseline['views']
+
+    Query counts must not grow at all; p50/p95 latency and peak memory may
+    grow by tolerance before they count. p99 is reported but not gated: at
+    a few dozen requests it is a single sample.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        expected = baseline['views'].get(name)
+        if expected is None:
+            continue
+        if metrics['queries'] > expected['queries']:
+            regressions.append(f"{name}: {metrics['queries']} queries, baseline {expected['queries']}")
+        for key in ('p50_ms', 'p95_ms', 'peak_kib'):
+            if metrics[key] > expected[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {metrics[key]}, baseline {expected[key]}")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_baseline(path, results, scale, requests):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'scale': scale, 'requests': requests, 'views': results}, f, indent=2, sort_keys=True)
+        f.write('\n')
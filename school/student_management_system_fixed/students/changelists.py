@@ -0,0 +1,150 @@
+import hashlib
+
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.forms.models import BaseModelFormSet
+from django.utils.functional import cached_property
+
+
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that caches COUNT(*) per query
+
+    The key holds the query's SQL and parameters plus an optional version
+    stamp; without one the count may lag writes by the cache timeout.
+    """
+
+    def __init__(self, *args, version=None, timeout=ADMIN_COUNT_CACHE_TIMEOUT, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = version
+        self.timeout = timeout
+
+    @cached_property
+    def count(self):
+        sql, params = self.object_list.query.sql_with_params()
+        digest = hashlib.md5(repr((sql, params, self.version)).encode()).hexdigest()
+        key = f'admin:count:{self.object_list.model._meta.label_lower}:{digest}'
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, self.timeout)
+        return count
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """Foreign key filter backed by the admin autocomplete view
+
+    RelatedFieldListFilter renders one link per related row; this renders a
+    single select2 box that searches the related admin's search_fields, so
+    only the selected row is ever loaded.
+    """
+
+    template = 'admin/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.lookup_val = self.used_parameters.get(self.lookup_kwarg)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        value = self.lookup_val[-1] if isinstance(self.lookup_val, list) else self.lookup_val
+        yield {
+            'selected': value is not None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': self.form_field.widget.render(
+                self.lookup_kwarg, value, attrs={'onchange': 'this.form.submit()', 'style': 'width: 100%'}
+            ),
+            'hidden_params': [
+                (name, param) for name, param in changelist.params.items() if name != self.lookup_kwarg
+            ],
+        }
+
+
+class LoadedRowChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField that resolves pks against rows loaded up front"""
+
+    def __init__(self, rows, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rows = rows
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.rows[self.queryset.model._meta.pk.to_python(value)]
+        except (KeyError, ValidationError):
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+
+class LoadedRowsModelFormSet(BaseModelFormSet):
+    """Model formset whose hidden pk fields do not query one row each
+
+    The stock pk field is a ModelChoiceField that runs queryset.get() per
+    form while validating; here it looks the row up in the formset's own
+    queryset, which is loaded once anyway.
+    """
+
+    @cached_property
+    def loaded_rows(self):
+        return {obj.pk: obj for obj in self.get_queryset()}
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        name = self._pk_field.name
+        field = form.fields[name]
+        form.fields[name] = LoadedRowChoiceField(
+            self.loaded_rows, field.queryset,
+            initial=field.initial, required=False, widget=field.widget,
+        )
+
+
+class FastChangeListMixin:
+    """ModelAdmin settings for changelists over large tables
+
+    Counts come from CachedCountPaginator and the unfiltered total is not
+    counted at all; foreign key filters should use AutocompleteFilter.
+    list_editable rows are validated without a query per row.
+    """
+
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+    def get_count_version(self):
+        """Version stamp that invalidates cached counts, None for timeout only"""
+        return None
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            version=self.get_count_version(),
+        )
+
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs.setdefault('formset', LoadedRowsModelFormSet)
+        return super().get_changelist_formset(request, **kwargs)
+
+    @property
+    def media(self):
+        autocomplete = AutocompleteSelect(None, self.admin_site)
+        return super().media + autocomplete.media
@@ -0,0 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
+from .versioning import get_data_version
+
+
+def data_version(request):
+    """data_version for {% cache %} fragment keys, read only if a template uses it"""
+    return {'data_version': SimpleLazyObject(get_data_version)}
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.contrib import messages
+from django.utils.cache import patch_cache_control
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
+from .versioning import get_version, model_version_key
+
+
+def condition_on_models(*models):
+    """Answer conditional GETs from the version stamps of models
+
+    The ETag and Last-Modified of the response are derived from the stamps
+    (plus the active language), so a client holding the current version
+    gets a 304 after one cache lookup, before the view runs any query or
+    renders a template. Requests with pending flash messages always get a
+    full response so the messages are shown.
+    """
+    keys = [model_version_key(model) for model in models]
+
+    def versions(request):
+        if not hasattr(request, '_model_versions'):
+            request._model_versions = [get_version(key) for key in keys]
+        return request._model_versions
+
+    def etag(request, *args, **kwargs):
+        return '-'.join(str(version) for version in versions(request)) + f'-{get_language()}'
+
+    def last_modified(request, *args, **kwargs):
+        return datetime.fromtimestamp(max(versions(request)) / 1e9, tz=timezone.utc)
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if len(messages.get_messages(request)):
+                return view_func(request, *args, **kwargs)
+            response = conditional_view(request, *args, **kwargs)
+            # Stored copies must be revalidated, which is what makes them cheap
+            patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def query_budget(queries):
+    """Declare the most queries a request to this view may make
+
+    Enforced by students.querybudget.QueryBudgetMiddleware; the count
+    includes session and user lookups made by other middleware.
+    """
+    def decorator(view_func):
+        view_func.query_budget = queries
+        return view_func
+    return decorator
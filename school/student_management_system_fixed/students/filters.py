@@ -0,0 +1,75 @@
+from .models import Student
+from .forms import StudentSearchForm
+from .search import search_students
+
+
+DEFAULT_ORDER = 'first_name'
+
+# Every sort the list offers, mapped to the full ordering that one of the
+# Student.Meta indexes can serve (rowid/pk is the implicit last key of every
+# SQLite index). Anything else in ?order_by= falls back to DEFAULT_ORDER.
+STUDENT_ORDERINGS = {
+    'first_name': ('first_name', 'last_name', 'pk'),
+    '-first_name': ('-first_name', '-last_name', '-pk'),
+    'age': ('age', 'pk'),
+    '-age': ('-age', '-pk'),
+}
+
+
+def filter_students(params, queryset=None):
+    """Compile the StudentSearchForm filters and ordering in params into one queryset
+
+    Shared by student_list and the exporters so every view runs the same
+    query for the same filter. Returns (queryset, search_form, order_by).
+    """
+    students = Student.objects.all() if queryset is None else queryset
+    search_form = StudentSearchForm(params)
+    search_query = None
+
+    if search_form.is_valid():
+        search_query = search_form.cleaned_data.get('search_query')
+        year = search_form.cleaned_data.get('year')
+        gender = search_form.cleaned_data.get('gender')
+        is_active = search_form.cleaned_data.get('is_active')
+
+        if search_query:
+            ranked = 'order_by' not in params
+            students = search_students(students, search_query, ranked=ranked)
+
+        if year:
+            students = students.filter(year=year)
+
+        if gender:
+            students = students.filter(gender=gender)
+
+        if is_active:
+            students = students.filter(is_active=is_active == 'True')
+
+    order_by = params.get('order_by', DEFAULT_ORDER)
+    if order_by not in STUDENT_ORDERINGS:
+        order_by = DEFAULT_ORDER
+    ordering = STUDENT_ORDERINGS[order_by]
+    if search_query and 'search_rank' in students.query.annotations:
+        # No explicit sort requested: best matches first
+        students = students.order_by('search_rank', *ordering)
+    else:
+        students = students.order_by(*ordering)
+
+    return students, search_form, order_by
+
+
+def export_query_string(params):
+    """Filter params of the current list, without paging, for export links"""
+    query = params.copy()
+    for key in ('page', 'cursor', 'paginate'):
+        query.pop(key, None)
+    return query.urlencode()
+
+
+def cursor_query_string(params, cursor):
+    """Current list params pointing at another cursor page"""
+    query = params.copy()
+    query.pop('page', None)
+    query['paginate'] = 'cursor'
+    query['cursor'] = cursor
+    return query.urlencode()
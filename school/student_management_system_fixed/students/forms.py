@@ -7,7 +7,7 @@ class StudentForm(forms.ModelForm):
         model = Student
         fields = [
             'first_name', 'last_name', 'email', 'phone', 'age', 
-            'gender', 'student_id', 'year', 'gpa', 'address', 
+            'gender', 'student_id', 'year', 'address', 
             'photo', 'is_active'
         ]
         widgets = {
@@ -42,12 +42,6 @@ class StudentForm(forms.ModelForm):
             'year': forms.Select(attrs={
                 'class': 'form-select'
             }),
-            'gpa': forms.NumberInput(attrs={
-                'class': 'form-control',
-                'step': '0.01',
-                'min': '0',
-                'max': '4'
-            }),
             'address': forms.Textarea(attrs={
                 'class': 'form-control',
                 'rows': 3,
@@ -74,6 +68,30 @@ class StudentForm(forms.ModelForm):
             raise ValidationError("A student with this email already exists.")
         return email
 
+class StudentImportForm(StudentForm):
+    """Field definitions used to validate bulk import rows
+
+    The importer cleans rows against one instance of these fields and
+    checks student_id/email uniqueness for a whole batch at once. Unlike
+    StudentForm it takes a GPA, recorded until the student's first grade.
+    """
+    class Meta(StudentForm.Meta):
+        fields = [field for field in StudentForm.Meta.fields if field != 'photo'] + ['gpa']
+
+class StudentImportUploadForm(forms.Form):
+    file = forms.FileField(
+        widget=forms.FileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv,.xlsx'
+        })
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            raise ValidationError("Upload a .csv or .xlsx file.")
+        return upload
+
 class StudentSearchForm(forms.Form):
     search_query = forms.CharField(
         max_length=100,
@@ -126,3 +144,42 @@ class GradeForm(forms.ModelForm):
         }
 
 
+class GradebookForm(forms.Form):
+    """مصفوفة درجات مقرر كامل: حقل درجة لكل طالب"""
+
+    def __init__(self, *args, roster, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.roster = roster
+        for student, score in roster:
+            self.fields[self.field_name(student)] = forms.DecimalField(
+                max_digits=5,
+                decimal_places=2,
+                min_value=0,
+                max_value=100,
+                required=False,
+                initial=score,
+                label=student.full_name,
+                widget=forms.NumberInput(attrs={
+                    "class": "form-control form-control-sm",
+                    "step": "0.01",
+                    "min": "0",
+                    "max": "100",
+                })
+            )
+
+    @staticmethod
+    def field_name(student):
+        return f"score_{student.pk}"
+
+    def rows(self):
+        """(student, bound field) pairs in roster order, for the template"""
+        return [(student, self[self.field_name(student)]) for student, _ in self.roster]
+
+    def changed_scores(self):
+        """{student_id: score} for every entered score that differs from the stored one"""
+        return {
+            student.pk: self.cleaned_data[self.field_name(student)]
+            for student, score in self.roster
+            if self.cleaned_data[self.field_name(student)] is not None
+            and self.cleaned_data[self.field_name(student)] != score
+        }
@@ -0,0 +1,118 @@
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Sum, Value, When
+
+from .models import Grade, Student
+from .stats import add_queryset_stats, rebuild_student_stats
+from .versioning import bump_data_version
+
+
+# (minimum score, grade points) on the 4.0 scale, highest band first
+GRADE_SCALE = [
+    (95, Decimal('4.00')),
+    (90, Decimal('3.75')),
+    (85, Decimal('3.50')),
+    (80, Decimal('3.00')),
+    (75, Decimal('2.50')),
+    (70, Decimal('2.00')),
+    (65, Decimal('1.50')),
+    (60, Decimal('1.00')),
+]
+RECOMPUTE_BATCH_SIZE = 1000
+POINTS_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+def score_to_points(score):
+    for minimum, points in GRADE_SCALE:
+        if score >= minimum:
+            return points
+    return Decimal('0.00')
+
+
+def grade_points_expression(score='score'):
+    """SQL equivalent of score_to_points()"""
+    return Case(
+        *[When(**{f'{score}__gte': minimum}, then=Value(points)) for minimum, points in GRADE_SCALE],
+        default=Value(Decimal('0.00')),
+        output_field=POINTS_FIELD,
+    )
+
+
+def compute_gpa(points_total, credit_hours_total):
+    return (Decimal(points_total) / credit_hours_total).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def apply_gpa_delta(student_id, points, credit_hours):
+    """Add one grade's weighted points/credits to a student's running sums
+
+    The GPA follows from the stored sums, so a grade change costs one row
+    update rather than a re-read of the transcript. A student whose last
+    graded credits are removed drops back to 0.00. The save goes through
+    Student.save() so the stats counters and data version follow.
+    """
+    with transaction.atomic():
+        student = Student.objects.select_for_update().filter(pk=student_id).first()
+        if student is None:
+            return
+        student.grade_points_total += points
+        student.credit_hours_total += credit_hours
+        if student.credit_hours_total:
+            student.gpa = compute_gpa(student.grade_points_total, student.credit_hours_total)
+        else:
+            student.gpa = 0
+        student.save(update_fields=['grade_points_total', 'credit_hours_total', 'gpa'])
+
+
+def transcript_totals(students=None):
+    """(student_id, weighted points, credit hours) per graded student, one GROUP BY"""
+    grades = Grade.objects.all() if students is None else Grade.objects.filter(student__in=students)
+    return grades.order_by('student').values_list('student').annotate(
+        points=Sum(ExpressionWrapper(
+            grade_points_expression() * F('course__credit_hours'),
+            output_field=POINTS_FIELD,
+        )),
+        credits=Sum('course__credit_hours'),
+    )
+
+
+def recompute_gpa(student_ids=None, batch_size=RECOMPUTE_BATCH_SIZE):
+    """Rebuild running sums and GPAs from Grade rows with bulk_update batches
+
+    With student_ids only those students are recomputed (used by bulk grade
+    writes that bypass the Grade signals); otherwise every student is.
+    Returns the number of graded students updated.
+    """
+    students = Student.objects.all() if student_ids is None else Student.objects.filter(pk__in=student_ids)
+    updated = 0
+    with transaction.atomic():
+        if student_ids is not None:
+            add_queryset_stats(students, sign=-1)
+
+        students.filter(credit_hours_total__gt=0).exclude(
+            pk__in=Grade.objects.values('student')
+        ).update(grade_points_total=0, credit_hours_total=0, gpa=0)
+
+        rows = transcript_totals(None if student_ids is None else students).iterator(chunk_size=batch_size)
+        while True:
+            batch = [
+                Student(
+                    pk=student_id,
+                    grade_points_total=points,
+                    credit_hours_total=credits,
+                    gpa=compute_gpa(points, credits),
+                )
+                for student_id, points, credits in islice(rows, batch_size)
+            ]
+            if not batch:
+                break
+            Student.objects.bulk_update(batch, ['grade_points_total', 'credit_hours_total', 'gpa'])
+            updated += len(batch)
+
+        if student_ids is None:
+            rebuild_student_stats()
+        else:
+            add_queryset_stats(students, sign=1)
+    bump_data_version()
+    return updated
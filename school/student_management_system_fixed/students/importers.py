@@ -0,0 +1,233 @@
+import csv
+import io
+import zipfile
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .forms import StudentImportForm
+from .models import Student
+from .stats import add_students_stats
+from .versioning import bump_data_version
+
+
+IMPORT_BATCH_SIZE = 1000
+
+# Accept both model field names and the headers written by export_csv,
+# so an exported file can be edited and loaded back as-is.
+HEADER_ALIASES = {
+    'student id': 'student_id',
+    'first name': 'first_name',
+    'last name': 'last_name',
+    'email': 'email',
+    'phone': 'phone',
+    'age': 'age',
+    'gender': 'gender',
+    'year': 'year',
+    'gpa': 'gpa',
+    'address': 'address',
+    'active': 'is_active',
+}
+CHOICE_LABELS = {
+    'gender': {label: code for code, label in Student.GENDER_CHOICES},
+    'year': {label: code for code, label in Student.YEAR_CHOICES},
+}
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'active', 'نعم', 'نشط'}
+
+
+class ImportFileError(Exception):
+    """The upload cannot be read as a whole: wrong encoding, corrupt, unsupported"""
+
+
+class ImportReport:
+    """Outcome of an import: rows created and per-row errors"""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row_number, messages):
+        self.errors.append((row_number, messages))
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+def normalize_header(header):
+    key = (header or '').strip().lower()
+    return HEADER_ALIASES.get(key, key.replace(' ', '_'))
+
+
+def normalize_row(row):
+    """Map raw cell values onto StudentImportForm data"""
+    data = {}
+    for field, value in row.items():
+        value = '' if value is None else str(value).strip()
+        if field in CHOICE_LABELS:
+            value = CHOICE_LABELS[field].get(value, value)
+        if field == 'is_active':
+            value = value.lower() in TRUE_VALUES if value else True
+        data[field] = value
+    data.setdefault('is_active', True)
+    if not data.get('gpa'):
+        data['gpa'] = '0'
+    return data
+
+
+def decoded_lines(fileobj):
+    """UTF-8 lines of a binary file, decoded one at a time
+
+    Decoding per line rather than through a TextIOWrapper means an encoding
+    error surfaces on the line that has it, after every row before it.
+    """
+    for number, line in enumerate(fileobj, start=1):
+        try:
+            yield line.decode('utf-8-sig' if number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise ImportFileError(f"Line {number} is not UTF-8 text; save the file as CSV UTF-8.")
+
+
+def iter_csv_rows(fileobj):
+    lines = fileobj if isinstance(fileobj, io.TextIOBase) else decoded_lines(fileobj)
+    reader = csv.reader(lines)
+    try:
+        headers = [normalize_header(header) for header in next(reader, [])]
+        for values in reader:
+            if any(values):
+                yield dict(zip(headers, values))
+    except csv.Error as exc:
+        raise ImportFileError(f"Malformed CSV on line {reader.line_num}: {exc}")
+
+
+def iter_xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("Importing .xlsx files requires the openpyxl package.")
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, ValueError) as exc:
+        # Not a zip at all, or a zip without the workbook parts
+        raise ImportFileError(f"Not a valid .xlsx file: {exc}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [normalize_header(header) for header in next(rows, [])]
+        for values in rows:
+            if any(value not in (None, '') for value in values):
+                yield dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+
+def iter_import_rows(fileobj, filename):
+    """Stream dict rows from a .csv or .xlsx upload without loading it whole"""
+    if Path(filename).suffix.lower() == '.xlsx':
+        return iter_xlsx_rows(fileobj)
+    return iter_csv_rows(fileobj)
+
+
+class RowValidator:
+    """Clean row data with StudentImportForm's fields, built once per import
+
+    Constructing a form per row deep-copies every field and widget, which
+    dominates the cost of large imports; the fields themselves are reusable.
+    """
+
+    def __init__(self):
+        self.fields = StudentImportForm().fields
+
+    def clean(self, data):
+        cleaned, errors = {}, []
+        for name, field in self.fields.items():
+            value = field.widget.value_from_datadict(data, {}, name)
+            try:
+                cleaned[name] = field.clean(value)
+            except ValidationError as exc:
+                errors.extend(f"{name}: {message}" for message in exc.messages)
+        return cleaned, errors
+
+
+class StudentImporter:
+    """Validate and insert students in batches
+
+    Each batch is validated row by row without touching the database,
+    checked for existing student IDs and emails with one IN query per key,
+    and inserted with bulk_create inside its own transaction.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.report = ImportReport()
+        self.validator = RowValidator()
+        self.seen_student_ids = set()
+        self.seen_emails = set()
+
+    def run(self, rows):
+        numbered = self.numbered(rows)
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+        if self.report.created and not self.dry_run:
+            bump_data_version()
+        return self.report
+
+    def numbered(self, rows):
+        """(row number, row) pairs; a file unreadable part way stops the import
+
+        Batches already read are kept, so the failure goes into the report
+        at the row it happened on. A file unreadable from the start raises
+        ImportFileError instead.
+        """
+        # Row 1 is the header, data starts on row 2
+        row_number = 1
+        try:
+            for row_number, row in enumerate(rows, start=2):
+                yield row_number, row
+        except ImportFileError as exc:
+            if row_number == 1:
+                raise
+            self.report.add_error(row_number + 1, [f"{exc} Rows from here on were not imported."])
+
+    def import_batch(self, batch):
+        valid = []
+        for row_number, row in batch:
+            cleaned, errors = self.validator.clean(normalize_row(row))
+            if errors:
+                self.report.add_error(row_number, errors)
+                continue
+            valid.append((row_number, Student(**cleaned)))
+
+        student_ids = {student.student_id for _, student in valid}
+        emails = {student.email for _, student in valid}
+        taken_ids = set(Student.objects.filter(student_id__in=student_ids).values_list('student_id', flat=True))
+        taken_emails = set(Student.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        students = []
+        for row_number, student in valid:
+            messages = []
+            if student.student_id in taken_ids or student.student_id in self.seen_student_ids:
+                messages.append("student_id: A student with this ID already exists.")
+            if student.email in taken_emails or student.email in self.seen_emails:
+                messages.append("email: A student with this email already exists.")
+            if messages:
+                self.report.add_error(row_number, messages)
+                continue
+            self.seen_student_ids.add(student.student_id)
+            self.seen_emails.add(student.email)
+            students.append(student)
+
+        if students and not self.dry_run:
+            with transaction.atomic():
+                Student.objects.bulk_create(students)
+                add_students_stats(students)
+        self.report.created += len(students)
+
+
+def import_students(fileobj, filename, **options):
+    return StudentImporter(**options).run(iter_import_rows(fileobj, filename))
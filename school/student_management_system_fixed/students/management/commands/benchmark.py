@@ -0,0 +1,83 @@
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from students.benchmark import (
+    BENCHMARK_REQUESTS, BENCHMARK_TOLERANCE, BENCHMARK_WARMUP, SCENARIOS,
+    compare, load_baseline, run_benchmarks, write_baseline,
+)
+from students.seeding import seed_database
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway test database, time the main views and compare them '
+            'with the committed baseline; exits non-zero on regression')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Seed scale (see the seed command)')
+        parser.add_argument('--requests', type=int, default=BENCHMARK_REQUESTS, help='Timed requests per view')
+        parser.add_argument('--warmup', type=int, default=BENCHMARK_WARMUP)
+        parser.add_argument('--view', action='append', choices=[s.name for s in SCENARIOS], dest='views',
+                            help='Only this view (repeatable)')
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'))
+        parser.add_argument('--tolerance', type=float, default=BENCHMARK_TOLERANCE,
+                            help='Allowed fractional growth of p50/p95 latency and peak memory')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Write the results as the new baseline instead of comparing')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if not options['update_baseline']:
+            baseline = load_baseline(options['baseline'])
+            if baseline['scale'] != options['scale']:
+                raise CommandError(
+                    f"Baseline was recorded at --scale {baseline['scale']}, not {options['scale']}"
+                )
+
+        results = self.run(options)
+        self.report(results, baseline)
+
+        if options['update_baseline']:
+            Path(options['baseline']).parent.mkdir(parents=True, exist_ok=True)
+            write_baseline(options['baseline'], results, options['scale'], options['requests'])
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+        regressions = compare(results, baseline, options['tolerance'])
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(f'{len(regressions)} benchmark regression(s)')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def run(self, options):
+        # Production-like settings: no query logging, fragment caching on, and
+        # PDF reports rendered somewhere that is thrown away afterwards.
+        caches = {**settings.CACHES, 'fragments': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'benchmark-fragments',
+        }}
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with tempfile.TemporaryDirectory() as reports, \
+                    override_settings(CACHES=caches, REPORT_CACHE_DIR=Path(reports)):
+                self.stdout.write(f"Seeding at --scale {options['scale']}...")
+                seed_database(scale=options['scale'])
+                return run_benchmarks(options['requests'], options['warmup'], options['views'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def report(self, results, baseline):
+        columns = ['p50_ms', 'p95_ms', 'p99_ms', 'queries', 'peak_kib']
+        self.stdout.write(f"{'view':<24}" + ''.join(f'{column:>18}' for column in columns))
+        for name, metrics in results.items():
+            expected = (baseline or {}).get('views', {}).get(name, {})
+            cells = [
+                f"{metrics[column]} ({expected[column]})" if column in expected else str(metrics[column])
+                for column in columns
+            ]
+            self.stdout.write(f'{name:<24}' + ''.join(f'{cell:>18}' for cell in cells))
@@ -0,0 +1,33 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from students.models import Student
+from students.thumbnails import remember_thumbnails, render_thumbnails
+from teachers.models import Teacher
+
+
+class Command(BaseCommand):
+    help = 'Render missing photo thumbnails for every student and teacher, in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Worker processes (default: one per CPU)')
+
+    def handle(self, *args, **options):
+        photos = {}
+        for model in (Student, Teacher):
+            for fieldfile in (obj.photo for obj in model.objects.exclude(photo='').exclude(photo=None).only('photo')):
+                photos[fieldfile.name] = fieldfile.path
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(render_thumbnails, path): name for name, path in photos.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    remember_thumbnails(name, future.result())
+                    done += 1
+                except (OSError, ValueError) as exc:
+                    failed += 1
+                    self.stderr.write(f'{name}: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'Thumbnails ready for {done} photos ({failed} failed).'))
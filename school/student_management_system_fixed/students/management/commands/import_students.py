@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from students.importers import IMPORT_BATCH_SIZE, ImportFileError, import_students
+
+
+class Command(BaseCommand):
+    help = 'Bulk import students from a .csv or .xlsx file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, insert nothing')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as fileobj:
+                report = import_students(
+                    fileobj, path,
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(exc)
+
+        for row_number, messages in report.errors:
+            self.stderr.write(f"Row {row_number}: {'; '.join(messages)}")
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {report.created} students, {report.failed} rows rejected.'
+        ))
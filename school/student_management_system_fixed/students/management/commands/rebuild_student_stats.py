@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from students.models import StudentStats
+from students.stats import rebuild_student_stats
+from students.versioning import bump_data_version
+
+
+class Command(BaseCommand):
+    help = 'Recount the StudentStats counters table from the Student table'
+
+    def handle(self, *args, **options):
+        rebuild_student_stats()
+        bump_data_version()
+        buckets = StudentStats.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {buckets} student stats buckets.'))
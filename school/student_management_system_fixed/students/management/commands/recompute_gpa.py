@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from students.gpa import RECOMPUTE_BATCH_SIZE, recompute_gpa
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every student GPA from Grade rows and course credit hours'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=RECOMPUTE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        updated = recompute_gpa(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed GPA for {updated} graded students.'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from students.seeding import SEED_BATCH_SIZE, clear_seeded_data, seed_database, seed_sizes
+
+
+class Command(BaseCommand):
+    help = 'Generate deterministic synthetic students, teachers, courses and grades for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='1 is 1k students, 5 teachers, 20k grades; 1000 is 1M students, 5k teachers, 20M grades')
+        parser.add_argument('--seed', type=int, default=0, help='Same seed, same data')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Worker processes for students and grades')
+        parser.add_argument('--batch-size', type=int, default=SEED_BATCH_SIZE)
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously seeded rows first')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            clear_seeded_data()
+            self.stdout.write('Cleared previously seeded data.')
+        sizes = seed_sizes(options['scale'])
+        self.stdout.write(
+            f"Seeding {sizes['students']} students, {sizes['teachers']} teachers, "
+            f"{sizes['courses']} courses and {sizes['grades']} grades..."
+        )
+        seed_database(
+            scale=options['scale'],
+            seed=options['seed'],
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            log=lambda message: self.stdout.write(f'  {message}') if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS('Seeded database.'))
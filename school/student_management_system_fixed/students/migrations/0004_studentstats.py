@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-17 23:38
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_student_stats(apps, schema_editor):
+    Student = apps.get_model('students', 'Student')
+    StudentStats = apps.get_model('students', 'StudentStats')
+    rows = Student.objects.order_by().values('year', 'gender', 'is_active').annotate(
+        n=Count('pk'), gpa_sum=Sum('gpa')
+    )
+    StudentStats.objects.bulk_create([
+        StudentStats(
+            year=row['year'], gender=row['gender'], is_active=row['is_active'],
+            count=row['n'], gpa_total=row['gpa_sum'] or 0
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_grade'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.CharField(choices=[('1', 'السنة الأولى'), ('2', 'السنة الثانية'), ('3', 'السنة الثالثة'), ('4', 'السنة الرابعة')], max_length=1, verbose_name='السنة الدراسية')),
+                ('gender', models.CharField(choices=[('M', 'ذكر'), ('F', 'أنثى')], max_length=1, verbose_name='الجنس')),
+                ('is_active', models.BooleanField(verbose_name='حالة النشاط')),
+                ('count', models.IntegerField(default=0, verbose_name='عدد الطلاب')),
+                ('gpa_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='مجموع المعدلات')),
+            ],
+            options={
+                'verbose_name': 'إحصائية طلاب',
+                'verbose_name_plural': 'إحصائيات الطلاب',
+                'unique_together': {('year', 'gender', 'is_active')},
+            },
+        ),
+        migrations.RunPython(populate_student_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+# Frozen copy of the index as first created; later migrations change the
+# update trigger. Migrations must not import students.search, which follows
+# the current schema.
+FTS_TABLE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS students_student_fts "
+    "USING fts5(first_name, last_name, email, student_id, "
+    "content='students_student', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+FTS_TRIGGERS_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS students_student_fts_ai AFTER INSERT ON students_student "
+    "BEGIN INSERT INTO students_student_fts(rowid, first_name, last_name, email, student_id) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.student_id); END",
+    "CREATE TRIGGER IF NOT EXISTS students_student_fts_ad AFTER DELETE ON students_student "
+    "BEGIN INSERT INTO students_student_fts(students_student_fts, rowid, first_name, last_name, email, student_id) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.student_id); END",
+    "CREATE TRIGGER IF NOT EXISTS students_student_fts_au AFTER UPDATE ON students_student "
+    "BEGIN INSERT INTO students_student_fts(students_student_fts, rowid, first_name, last_name, email, student_id) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.student_id); "
+    "INSERT INTO students_student_fts(rowid, first_name, last_name, email, student_id) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.student_id); END",
+]
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(FTS_TABLE_SQL)
+    except OperationalError:
+        # SQLite built without FTS5: search keeps using icontains
+        return
+    for sql in FTS_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+    schema_editor.execute("INSERT INTO students_student_fts(students_student_fts) VALUES ('rebuild')")
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for trigger in ('ai', 'ad', 'au'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS students_student_fts_{trigger}')
+    schema_editor.execute('DROP TABLE IF EXISTS students_student_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_studentstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
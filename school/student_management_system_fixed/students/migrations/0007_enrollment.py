@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-17 23:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of the FTS sync triggers at this point of the history (see
+# 0005); migrations must not import students.search.
+FTS_TRIGGERS_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS students_student_fts_ai AFTER INSERT ON students_student "
+    "BEGIN INSERT INTO students_student_fts(rowid, first_name, last_name, email, student_id) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.student_id); END",
+    "CREATE TRIGGER IF NOT EXISTS students_student_fts_ad AFTER DELETE ON students_student "
+    "BEGIN INSERT INTO students_student_fts(students_student_fts, rowid, first_name, last_name, email, student_id) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.student_id); END",
+    "CREATE TRIGGER IF NOT EXISTS students_student_fts_au AFTER UPDATE ON students_student "
+    "BEGIN INSERT INTO students_student_fts(students_student_fts, rowid, first_name, last_name, email, student_id) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.student_id); "
+    "INSERT INTO students_student_fts(rowid, first_name, last_name, email, student_id) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.student_id); END",
+]
+
+
+def reinstall_fts_index(apps, schema_editor):
+    # Adding the field remakes students_student on SQLite, dropping its triggers
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or 'students_student_fts' not in connection.introspection.table_names():
+        return
+    for sql in FTS_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_student_list_indexes'),
+        ('teachers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_enrolled', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ التسجيل')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teachers.course', verbose_name='المقرر')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='students.student', verbose_name='الطالب')),
+            ],
+            options={
+                'verbose_name': 'تسجيل في مقرر',
+                'verbose_name_plural': 'التسجيلات في المقررات',
+            },
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='courses',
+            field=models.ManyToManyField(blank=True, related_name='students', through='students.Enrollment', to='teachers.course', verbose_name='المقررات'),
+        ),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(fields=('course', 'student'), name='enrollment_course_student_uniq'),
+        ),
+        migrations.RunPython(reinstall_fts_index, migrations.RunPython.noop),
+    ]
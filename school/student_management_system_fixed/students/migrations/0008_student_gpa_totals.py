@@ -0,0 +1,113 @@
+# Generated by Django 5.2.5 on 2026-10-17 23:45
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Case, Count, ExpressionWrapper, F, Sum, Value, When
+
+
+# Frozen copy of the 4.0 scale as of this migration (students.gpa may change
+# later): (minimum score, grade points), highest band first.
+GRADE_SCALE = [
+    (95, Decimal('4.00')),
+    (90, Decimal('3.75')),
+    (85, Decimal('3.50')),
+    (80, Decimal('3.00')),
+    (75, Decimal('2.50')),
+    (70, Decimal('2.00')),
+    (65, Decimal('1.50')),
+    (60, Decimal('1.00')),
+]
+POINTS_FIELD = models.DecimalField(max_digits=10, decimal_places=2)
+
+# Frozen copy of the FTS sync triggers at this point of the history (see
+# 0005); migrations must not import students.search.
+FTS_TRIGGERS_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS students_student_fts_ai AFTER INSERT ON students_student "
+    "BEGIN INSERT INTO students_student_fts(rowid, first_name, last_name, email, student_id) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.student_id); END",
+    "CREATE TRIGGER IF NOT EXISTS students_student_fts_ad AFTER DELETE ON students_student "
+    "BEGIN INSERT INTO students_student_fts(students_student_fts, rowid, first_name, last_name, email, student_id) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.student_id); END",
+    "CREATE TRIGGER IF NOT EXISTS students_student_fts_au AFTER UPDATE ON students_student "
+    "BEGIN INSERT INTO students_student_fts(students_student_fts, rowid, first_name, last_name, email, student_id) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.student_id); "
+    "INSERT INTO students_student_fts(rowid, first_name, last_name, email, student_id) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.student_id); END",
+]
+
+
+
+def populate_gpa_totals(apps, schema_editor):
+    """Seed the running sums, and the GPAs that follow from them, from the grades
+
+    Incremental updates then start from the full transcript. Students
+    without graded credits keep their recorded GPA. The StudentStats
+    buckets are recounted because their GPA totals moved.
+    """
+    Grade = apps.get_model('students', 'Grade')
+    Student = apps.get_model('students', 'Student')
+    StudentStats = apps.get_model('students', 'StudentStats')
+    grade_points = Case(
+        *[When(score__gte=minimum, then=Value(points)) for minimum, points in GRADE_SCALE],
+        default=Value(Decimal('0.00')),
+        output_field=POINTS_FIELD,
+    )
+    rows = Grade.objects.order_by('student').values_list('student').annotate(
+        points=Sum(ExpressionWrapper(grade_points * F('course__credit_hours'), output_field=POINTS_FIELD)),
+        credits=Sum('course__credit_hours'),
+    )
+    Student.objects.bulk_update(
+        [
+            Student(
+                pk=pk, grade_points_total=points, credit_hours_total=credits,
+                gpa=(Decimal(points) / credits).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            )
+            for pk, points, credits in rows if credits
+        ],
+        ['grade_points_total', 'credit_hours_total', 'gpa'],
+        batch_size=1000,
+    )
+
+    buckets = Student.objects.order_by().values('year', 'gender', 'is_active').annotate(
+        n=Count('pk'), gpa_sum=Sum('gpa')
+    )
+    StudentStats.objects.all().delete()
+    StudentStats.objects.bulk_create([
+        StudentStats(
+            year=row['year'], gender=row['gender'], is_active=row['is_active'],
+            count=row['n'], gpa_total=row['gpa_sum'] or 0
+        )
+        for row in buckets
+    ])
+
+
+def reinstall_fts_index(apps, schema_editor):
+    # Adding the fields remakes students_student on SQLite, dropping its triggers
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or 'students_student_fts' not in connection.introspection.table_names():
+        return
+    for sql in FTS_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_enrollment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='credit_hours_total',
+            field=models.IntegerField(default=0, editable=False, verbose_name='مجموع الساعات المعتمدة'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='grade_points_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10, verbose_name='مجموع النقاط الموزونة'),
+        ),
+        migrations.RunPython(populate_gpa_totals, migrations.RunPython.noop),
+        migrations.RunPython(reinstall_fts_index, migrations.RunPython.noop),
+    ]
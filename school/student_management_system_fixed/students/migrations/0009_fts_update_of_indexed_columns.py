@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+# Frozen copies of the update trigger before and after this migration;
+# migrations must not import students.search.
+FTS_UPDATE_BODY = (
+    "BEGIN INSERT INTO students_student_fts(students_student_fts, rowid, first_name, last_name, email, student_id) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.student_id); "
+    "INSERT INTO students_student_fts(rowid, first_name, last_name, email, student_id) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.student_id); END"
+)
+# Only the indexed columns: GPA deltas, status toggles and bulk recomputes
+# must not rewrite the index entry
+UPDATE_OF_INDEXED_COLUMNS = (
+    "CREATE TRIGGER students_student_fts_au "
+    "AFTER UPDATE OF first_name, last_name, email, student_id ON students_student "
+) + FTS_UPDATE_BODY
+UPDATE_OF_ANY_COLUMN = (
+    "CREATE TRIGGER students_student_fts_au AFTER UPDATE ON students_student "
+) + FTS_UPDATE_BODY
+
+
+def replace_update_trigger(sql):
+    def operation(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != 'sqlite' or 'students_student_fts' not in connection.introspection.table_names():
+            return
+        schema_editor.execute('DROP TRIGGER IF EXISTS students_student_fts_au')
+        schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0008_student_gpa_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            replace_update_trigger(UPDATE_OF_INDEXED_COLUMNS),
+            replace_update_trigger(UPDATE_OF_ANY_COLUMN),
+        ),
+    ]
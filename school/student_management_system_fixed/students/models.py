@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.urls import reverse
+from decimal import Decimal
 
 class Student(models.Model):
     GENDER_CHOICES = [
@@ -26,20 +27,55 @@ class Student(models.Model):
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES, verbose_name="الجنس")
     student_id = models.CharField(max_length=20, unique=True, verbose_name="رقم الطالب")
     year = models.CharField(max_length=1, choices=YEAR_CHOICES, verbose_name="السنة الدراسية")
+    # Derived from the grades by students.gpa and read-only in forms and the
+    # admin. Only the importer sets it, for students arriving without any
+    # grades here; their first grade replaces it.
     gpa = models.DecimalField(max_digits=3, decimal_places=2, default=0.0, verbose_name="المعدل التراكمي")
+    # Running sums behind gpa, maintained by students.gpa as grades change
+    grade_points_total = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False, verbose_name="مجموع النقاط الموزونة")
+    credit_hours_total = models.IntegerField(default=0, editable=False, verbose_name="مجموع الساعات المعتمدة")
     address = models.TextField(blank=True, verbose_name="العنوان")
     photo = models.ImageField(upload_to='student_photos/', blank=True, null=True, verbose_name="الصورة الشخصية")
     date_enrolled = models.DateField(auto_now_add=True, verbose_name="تاريخ التسجيل")
     is_active = models.BooleanField(default=True, verbose_name="حالة النشاط")
+    courses = models.ManyToManyField(
+        'teachers.Course',
+        through='Enrollment',
+        related_name='students',
+        blank=True,
+        verbose_name="المقررات"
+    )
     
     class Meta:
         verbose_name = "طالب"
         verbose_name_plural = "الطلاب"
         ordering = ['first_name', 'last_name']
+        # Match the student_list filters (is_active, year) followed by the
+        # whitelisted sorts in students.filters.STUDENT_ORDERINGS
+        indexes = [
+            models.Index(fields=['first_name', 'last_name'], name='student_name_idx'),
+            models.Index(fields=['age'], name='student_age_idx'),
+            models.Index(fields=['year', 'first_name', 'last_name'], name='student_year_name_idx'),
+            models.Index(fields=['is_active', 'first_name', 'last_name'], name='student_active_name_idx'),
+            models.Index(fields=['is_active', 'year', 'first_name', 'last_name'], name='student_active_year_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.student_id})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_stats_bucket = instance.stats_bucket
+        return instance
+    
+    @property
+    def stats_bucket(self):
+        """(year, gender, is_active, gpa) as counted in StudentStats, None if deferred"""
+        if self.get_deferred_fields() & {'year', 'gender', 'is_active', 'gpa'}:
+            return None
+        return (self.year, self.gender, self.is_active, Decimal(str(self.gpa)))
+    
     def get_absolute_url(self):
         return reverse('student_detail', kwargs={'pk': self.pk})
     
@@ -52,6 +88,23 @@ class Student(models.Model):
         return dict(self.YEAR_CHOICES)[self.year]
 
 
+class StudentStats(models.Model):
+    """عدادات الطلاب لكل (سنة، جنس، حالة) تُحدَّث تزايدياً"""
+    year = models.CharField(max_length=1, choices=Student.YEAR_CHOICES, verbose_name="السنة الدراسية")
+    gender = models.CharField(max_length=1, choices=Student.GENDER_CHOICES, verbose_name="الجنس")
+    is_active = models.BooleanField(verbose_name="حالة النشاط")
+    count = models.IntegerField(default=0, verbose_name="عدد الطلاب")
+    gpa_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="مجموع المعدلات")
+    
+    class Meta:
+        verbose_name = "إحصائية طلاب"
+        verbose_name_plural = "إحصائيات الطلاب"
+        unique_together = ['year', 'gender', 'is_active']
+    
+    def __str__(self):
+        return f"{self.year}/{self.gender}/{self.is_active}: {self.count}"
+
+
 from teachers.models import Course
 
 class Grade(models.Model):
@@ -67,4 +120,33 @@ class Grade(models.Model):
     
     def __str__(self):
         return f"{self.student.full_name} - {self.course.name}: {self.score}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_gpa_key = instance.gpa_key
+        return instance
+    
+    @property
+    def gpa_key(self):
+        """(student_id, course_id, score) as counted in the student's GPA sums"""
+        if self.get_deferred_fields() & {'student_id', 'course_id', 'score'}:
+            return None
+        return (self.student_id, self.course_id, self.score)
 
+
+class Enrollment(models.Model):
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, verbose_name="الطالب")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, verbose_name="المقرر")
+    date_enrolled = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ التسجيل")
+    
+    class Meta:
+        verbose_name = "تسجيل في مقرر"
+        verbose_name_plural = "التسجيلات في المقررات"
+        # Course first: rosters are looked up by course
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'student'], name='enrollment_course_student_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.student.full_name} - {self.course.name}"
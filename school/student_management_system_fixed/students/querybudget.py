@@ -0,0 +1,148 @@
+"""Queries and SQL time per URL name, checked against per-view budgets
+
+QueryBudgetMiddleware counts every query a request makes, session and user
+lookups included, and adds it to a per-process tally shown on the
+query_diagnostics page. Views declare their budget with
+@query_budget(n) (students.decorators); going over it is logged, or raised
+as QueryBudgetExceeded when settings.QUERY_BUDGET_STRICT is on, which
+QueryBudgetTestRunner does for the whole test suite.
+"""
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class count_queries:
+    """Context manager counting queries and their wall time on every database
+
+    Unlike assertNumQueries it works with DEBUG off, and it can be entered
+    again to keep adding to the same totals (the middleware does so while a
+    streaming response is consumed).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+
+class QueryStats:
+    """Per-process totals by URL name; each worker process keeps its own"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, name, counter, budget):
+        with self._lock:
+            row = self._views.setdefault(name, {
+                'requests': 0, 'queries': 0, 'max_queries': 0, 'sql_ms': 0.0,
+                'budget': budget, 'violations': 0,
+            })
+            row['requests'] += 1
+            row['queries'] += counter.count
+            row['max_queries'] = max(row['max_queries'], counter.count)
+            row['sql_ms'] += counter.duration_ms
+            row['budget'] = budget
+            if budget is not None and counter.count > budget:
+                row['violations'] += 1
+
+    def snapshot(self):
+        """Rows sorted by total SQL time, with per-request averages"""
+        with self._lock:
+            rows = [{'name': name, **row} for name, row in self._views.items()]
+        for row in rows:
+            row['avg_queries'] = row['queries'] / row['requests']
+            row['avg_sql_ms'] = row['sql_ms'] / row['requests']
+        return sorted(rows, key=lambda row: row['sql_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+query_stats = QueryStats()
+
+
+class QueryBudgetMiddleware:
+    """Count the queries of each request and enforce the view's budget"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = count_queries()
+        with counter:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is None or not match.url_name:
+            return response
+        name = f'{match.namespace}:{match.url_name}' if match.namespace else match.url_name
+        budget = getattr(match.func, 'query_budget', None)
+        if response.streaming:
+            # Streamed bodies (the CSV export) query while being consumed
+            response.streaming_content = self.finish_streaming(response.streaming_content, counter, name, budget)
+        else:
+            self.finish(counter, name, budget)
+        return response
+
+    def finish_streaming(self, content, counter, name, budget):
+        with counter:
+            yield from content
+        self.finish(counter, name, budget)
+
+    def finish(self, counter, name, budget):
+        query_stats.record(name, counter, budget)
+        if budget is None or counter.count <= budget:
+            return
+        message = f"{name} made {counter.count} queries, budget {budget} ({counter.duration_ms:.1f} ms of SQL)"
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """DiscoverRunner under which going over a query budget fails the test"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._strict_budgets = override_settings(QUERY_BUDGET_STRICT=True)
+        self._strict_budgets.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._strict_budgets.disable()
+        super().teardown_test_environment(**kwargs)
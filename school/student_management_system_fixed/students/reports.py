@@ -0,0 +1,187 @@
+import hashlib
+import os
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+
+from .models import Student
+from .versioning import get_data_version
+
+
+PAGE_SIZE = letter
+MARGIN = 0.5 * inch
+ROW_HEIGHT = 16
+HEADER_HEIGHT = 22
+TITLE_HEIGHT = 36
+REPORT_FETCH_SIZE = 2000
+# Reports of older data versions are kept this long after they were
+# written, so requests still streaming them are not cut off
+REPORT_PRUNE_GRACE = 10 * 60
+
+REPORT_COLUMNS = ['ID', 'Name', 'Email', 'Year', 'GPA', 'Status']
+REPORT_COL_WIDTHS = [1.2 * inch, 1.7 * inch, 2.3 * inch, 1.0 * inch, 0.6 * inch, 0.7 * inch]
+CELL_FONT = ('Helvetica', 8)
+# Table's default left plus right cell padding
+CELL_PADDING = 12
+# Text of at most this many characters fits without being measured
+WIDEST_GLYPH = max(stringWidth(chr(code), *CELL_FONT) for code in range(32, 256))
+CELL_MAX_CHARS = [int((width - CELL_PADDING) // WIDEST_GLYPH) for width in REPORT_COL_WIDTHS]
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+
+
+def iter_report_rows(students):
+    """Yield table rows for the queryset straight from a chunked cursor"""
+    year_labels = dict(Student.YEAR_CHOICES)
+    rows = students.values_list(
+        'student_id', 'first_name', 'last_name', 'email', 'year', 'gpa', 'is_active'
+    ).iterator(chunk_size=REPORT_FETCH_SIZE)
+    for student_id, first_name, last_name, email, year, gpa, is_active in rows:
+        yield [
+            student_id,
+            f"{first_name} {last_name}",
+            email,
+            year_labels.get(year, year),
+            str(gpa),
+            'Active' if is_active else 'Inactive'
+        ]
+
+
+def clip_cell(text, width):
+    """text cut down with an ellipsis to fit a column width at CELL_FONT"""
+    available = width - CELL_PADDING
+    if stringWidth(text, *CELL_FONT) <= available:
+        return text
+    while text and stringWidth(text + '…', *CELL_FONT) > available:
+        text = text[:-1]
+    return text + '…'
+
+
+def clip_row(row):
+    """Rows have a fixed height, so cells are clipped rather than wrapped"""
+    return [
+        cell if len(cell) <= max_chars else clip_cell(cell, width)
+        for cell, width, max_chars in zip(row, REPORT_COL_WIDTHS, CELL_MAX_CHARS)
+    ]
+
+
+def rows_per_page(first_page=False):
+    _, height = PAGE_SIZE
+    usable = height - 2 * MARGIN - HEADER_HEIGHT
+    if first_page:
+        usable -= TITLE_HEIGHT
+    return max(1, int(usable // ROW_HEIGHT))
+
+
+def build_students_pdf(students, output, title="Students Report"):
+    """Render the queryset as a paginated PDF into output (path or file object)
+
+    Rows are pulled from the database one page at a time and each page is
+    laid out as its own fixed-width table with a repeated header, so layout
+    cost is linear in row count and memory holds a single page of rows.
+    """
+    width, height = PAGE_SIZE
+    pdf = canvas.Canvas(output, pagesize=PAGE_SIZE)
+    pdf.setTitle(title)
+    rows = iter_report_rows(students)
+    page_number = 1
+
+    while True:
+        first_page = page_number == 1
+        chunk = [clip_row(row) for row in islice(rows, rows_per_page(first_page))]
+        if not chunk and not first_page:
+            break
+
+        top = height - MARGIN
+        if first_page:
+            pdf.setFont('Helvetica-Bold', 18)
+            pdf.drawCentredString(width / 2, top - 20, title)
+            top -= TITLE_HEIGHT
+
+        table = Table(
+            [REPORT_COLUMNS] + chunk,
+            colWidths=REPORT_COL_WIDTHS,
+            rowHeights=[HEADER_HEIGHT] + [ROW_HEIGHT] * len(chunk),
+        )
+        table.setStyle(TABLE_STYLE)
+        _, table_height = table.wrapOn(pdf, width - 2 * MARGIN, top - MARGIN)
+        table.drawOn(pdf, (width - sum(REPORT_COL_WIDTHS)) / 2, top - table_height)
+
+        pdf.setFont('Helvetica', 8)
+        pdf.drawRightString(width - MARGIN, MARGIN / 2, f"Page {page_number}")
+        pdf.showPage()
+        page_number += 1
+
+    pdf.save()
+
+
+def report_cache_dir():
+    return Path(getattr(settings, 'REPORT_CACHE_DIR', Path(settings.BASE_DIR) / 'report_cache'))
+
+
+def open_cached_report(students, params):
+    """Open file of the PDF report for these filter params, rendering it on a cache miss
+
+    Reports are keyed by the data-version stamp, so any student write makes
+    the next download re-render while repeat downloads are served from disk.
+    Files of older versions are pruned when a new one is written, once they
+    are REPORT_PRUNE_GRACE old; the report is opened before pruning, so a
+    concurrent render cannot remove it from under this request either.
+    """
+    version = str(get_data_version())
+    query = '&'.join(
+        f"{key}={value}" for key in sorted(params) for value in params.getlist(key)
+        if key != 'page'
+    )
+    digest = hashlib.sha1(query.encode()).hexdigest()[:16]
+    cache_dir = report_cache_dir()
+    path = cache_dir / f"students-{version}-{digest}.pdf"
+    try:
+        return open(path, 'rb')
+    except FileNotFoundError:
+        pass
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            build_students_pdf(students, tmp)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    report = open(path, 'rb')
+    prune_reports(cache_dir, keep_prefix=f"students-{version}-")
+    return report
+
+
+def prune_reports(cache_dir, keep_prefix):
+    cutoff = time.time() - REPORT_PRUNE_GRACE
+    for stale in cache_dir.glob('students-*.pdf'):
+        if stale.name.startswith(keep_prefix):
+            continue
+        try:
+            if stale.stat().st_mtime < cutoff:
+                stale.unlink()
+        except OSError:
+            # Gone already, or still open on a platform that forbids that
+            pass
@@ -0,0 +1,124 @@
+import re
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = 'students_student_fts'
+FTS_COLUMNS = ['first_name', 'last_name', 'email', 'student_id']
+
+_fts_ready = {}
+
+
+def _fts_statements():
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+    delete_old = (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+    return {
+        FTS_TABLE: (
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({columns}, "
+            f"content='students_student', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        ),
+        f'{FTS_TABLE}_ai': (
+            f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON students_student "
+            f"BEGIN {insert_new} END"
+        ),
+        f'{FTS_TABLE}_ad': (
+            f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON students_student "
+            f"BEGIN {delete_old} END"
+        ),
+        # Only the indexed columns: GPA deltas, status toggles and bulk
+        # recomputes must not rewrite the index entry
+        f'{FTS_TABLE}_au': (
+            f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {columns} ON students_student "
+            f"BEGIN {delete_old} {insert_new} END"
+        ),
+    }
+
+
+def install_fts_index(conn=connection):
+    """Create the FTS5 mirror of students_student and its sync triggers
+
+    Idempotent: only missing objects are created, and triggers whose
+    definition changed are replaced. The index is rebuilt from the content
+    table whenever anything had to be (re)created. SQLite drops triggers
+    when a migration remakes students_student, so this also runs after
+    every migrate.
+    """
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name, type, sql FROM sqlite_master WHERE name LIKE %s", [f'{FTS_TABLE}%'])
+        existing = {name: (kind, sql) for name, kind, sql in cursor.fetchall()}
+        missing = {
+            name: sql for name, sql in _fts_statements().items()
+            if name not in existing or (existing[name][0] == 'trigger' and existing[name][1] != sql)
+        }
+        if not missing:
+            return True
+        try:
+            for name, sql in missing.items():
+                if name in existing:
+                    cursor.execute(f'DROP TRIGGER {name}')
+                cursor.execute(sql)
+        except Exception:
+            # SQLite built without FTS5: search keeps using icontains
+            return False
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    _fts_ready.pop(conn.settings_dict['NAME'], None)
+    return True
+
+
+def fts_available(conn=connection):
+    if conn.vendor != 'sqlite':
+        return False
+    name = conn.settings_dict['NAME']
+    if name not in _fts_ready:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_ready[name] = cursor.fetchone() is not None
+    return _fts_ready[name]
+
+
+def fts_match_expression(query):
+    """Prefix-match every word of the query: 'ahmed al' -> "ahmed"* "al"*
+
+    Words match from their start only, unlike the icontains fallback: "S00"
+    finds student S0001, "0001" does not.
+    """
+    terms = re.findall(r'[^\W_]+', query)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_students(queryset, query, ranked=False):
+    """Filter students matching query, via FTS5 on SQLite and icontains elsewhere
+
+    With ranked=True the FTS path also annotates search_rank (bm25, lower is
+    better) so callers can order by relevance.
+    """
+    match = fts_match_expression(query)
+    if match and fts_available():
+        queryset = queryset.filter(pk__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        ))
+        if ranked:
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f"SELECT rank FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = students_student.id", [match],
+                # Typed so that cursor pagination can seek on it
+                output_field=FloatField(),
+            ))
+        return queryset
+
+    return queryset.filter(
+        Q(first_name__icontains=query) |
+        Q(last_name__icontains=query) |
+        Q(email__icontains=query) |
+        Q(student_id__icontains=query)
+    )
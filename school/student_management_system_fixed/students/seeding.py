@@ -0,0 +1,288 @@
+"""Deterministic synthetic data at load-testing scale
+
+Row i of every table is generated from (seed, i) alone, so identifiers are
+collision free without existence checks and a given seed produces the same
+rows whatever the batch size or number of worker processes.
+"""
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from teachers.backends import invalidate_permission_cache
+from teachers.models import Course, Department, Teacher, rank_groups
+from .gpa import recompute_gpa
+from .models import Enrollment, Grade, Student
+from .stats import rebuild_student_stats
+from .versioning import bump_data_version
+
+
+# Rows per unit of --scale; scale 1000 is 1M students, 5k teachers, 20M grades
+SEED_BASE = {
+    'students': 1000,
+    'teachers': 5,
+}
+COURSES_PER_TEACHER = 4
+GRADES_PER_STUDENT = 20
+SEED_BATCH_SIZE = 5000
+SEED_USER_PREFIX = 'seed-'
+SEED_PASSWORD = 'teacher123'
+SEED_EMAIL_DOMAIN = '@seed.example.edu'
+
+FIRST_NAMES = [
+    'Ahmed', 'Fatima', 'Mohammed', 'Aisha', 'Omar', 'Khadija', 'Ali', 'Zainab',
+    'Hassan', 'Mariam', 'Yusuf', 'Layla', 'Ibrahim', 'Nour', 'Khalid', 'Sara',
+    'Abdullah', 'Amina', 'Malek', 'Huda', 'Tariq', 'Yasmin', 'Rashid', 'Dina',
+]
+LAST_NAMES = [
+    'Al-Rashid', 'Al-Zahra', 'Al-Mansouri', 'Al-Hashimi', 'Al-Qasimi', 'Al-Maktoum',
+    'Al-Sabah', 'Al-Thani', 'Al-Khalifa', 'Al-Saud', 'Al-Nahyan', 'Al-Sharqi',
+    'Al-Nuaimi', 'Al-Otaibi', 'Al-Dosari', 'Al-Ghamdi', 'Al-Harbi', 'Al-Shehri',
+]
+DEPARTMENTS = [
+    ('CS', 'قسم علوم الحاسوب'),
+    ('ENG', 'قسم الهندسة'),
+    ('BA', 'قسم إدارة الأعمال'),
+    ('MED', 'قسم الطب'),
+    ('ART', 'قسم الآداب'),
+]
+
+
+def seed_sizes(scale):
+    sizes = {name: max(1, int(base * scale)) for name, base in SEED_BASE.items()}
+    sizes['courses'] = sizes['teachers'] * COURSES_PER_TEACHER
+    sizes['grades'] = sizes['students'] * min(GRADES_PER_STUDENT, sizes['courses'])
+    return sizes
+
+
+def row_random(seed, table, index):
+    return random.Random(f'{seed}:{table}:{index}')
+
+
+def batches(total, batch_size):
+    return [(start, min(start + batch_size, total)) for start in range(0, total, batch_size)]
+
+
+def student_fields(seed, i):
+    rng = row_random(seed, 'student', i)
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        'first_name': first_name,
+        'last_name': last_name,
+        'email': f"{first_name.lower()}.{last_name.lower().replace('-', '')}.{i}{SEED_EMAIL_DOMAIN}",
+        'phone': f"+9665{rng.randint(0, 99999999):08d}",
+        'age': rng.randint(18, 28),
+        'gender': rng.choice('MF'),
+        'student_id': f"S{i:09d}",
+        'year': rng.choice('1234'),
+        'address': f"Street {rng.randint(1, 100)}, District {rng.randint(1, 20)}, City",
+        'is_active': rng.random() < 0.75,
+    }
+
+
+def seed_departments():
+    departments = []
+    for code, name in DEPARTMENTS:
+        department, _ = Department.objects.get_or_create(code=code, defaults={'name': name})
+        departments.append(department)
+    return departments
+
+
+def seed_teachers(seed, count, departments, batch_size):
+    """Users, Teachers and their rank groups, without a per-teacher save()
+
+    Every seeded user shares one password hash: PBKDF2 runs once instead of
+    once per teacher, and the accounts still log in with SEED_PASSWORD.
+    """
+    password = make_password(SEED_PASSWORD)
+    groups = rank_groups()
+    ranks = [code for code, _ in Teacher.RANK_CHOICES]
+    employment_types = [code for code, _ in Teacher.EMPLOYMENT_TYPE_CHOICES]
+    for start, stop in batches(count, batch_size):
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(
+                    username=f'{SEED_USER_PREFIX}teacher{i}',
+                    email=f'teacher{i}{SEED_EMAIL_DOMAIN}',
+                    first_name=row_random(seed, 'user', i).choice(FIRST_NAMES),
+                    last_name=row_random(seed, 'user', i).choice(LAST_NAMES),
+                    password=password,
+                )
+                for i in range(start, stop)
+            ])
+            teachers = []
+            for i, user in zip(range(start, stop), users):
+                rng = row_random(seed, 'teacher', i)
+                teachers.append(Teacher(
+                    user=user,
+                    employee_id=f'T{i:07d}',
+                    department=departments[i % len(departments)],
+                    rank=rng.choice(ranks),
+                    employment_type=rng.choice(employment_types),
+                    specialization='Seeded',
+                    hire_date=date(2024, 1, 1) - timedelta(days=rng.randint(365, 3650)),
+                    salary=rng.randint(8000, 25000),
+                    years_of_experience=rng.randint(1, 20),
+                ))
+            Teacher.objects.bulk_create(teachers)
+            User.groups.through.objects.bulk_create([
+                User.groups.through(user_id=teacher.user_id, group_id=groups[teacher.rank][0])
+                for teacher in teachers
+            ])
+    invalidate_permission_cache()
+
+
+def seed_courses(seed, count):
+    teachers = list(Teacher.objects.filter(user__username__startswith=SEED_USER_PREFIX)
+                    .order_by('employee_id').values_list('pk', 'department_id'))
+    courses = []
+    for i in range(count):
+        rng = row_random(seed, 'course', i)
+        teacher_id, department_id = teachers[i % len(teachers)]
+        courses.append(Course(
+            code=f'C{i:07d}',
+            name=f'Course {i}',
+            credit_hours=rng.randint(2, 4),
+            department_id=department_id,
+            teacher_id=teacher_id,
+            semester='الفصل الأول',
+            year=2024,
+        ))
+    Course.objects.bulk_create(courses, batch_size=SEED_BATCH_SIZE)
+
+
+def seeded_courses():
+    return Course.objects.filter(teacher__user__username__startswith=SEED_USER_PREFIX)
+
+
+def seeded_students():
+    return Student.objects.filter(email__endswith=SEED_EMAIL_DOMAIN)
+
+
+def generate_student_batch(seed, start, stop, course_ids, grades_per_student):
+    """Field dicts for students [start, stop) and their (course_id, score) lists
+
+    Pure computation, so it can run in worker processes while the parent
+    writes the previous batch.
+    """
+    students, grades = [], []
+    for i in range(start, stop):
+        students.append(student_fields(seed, i))
+        rng = row_random(seed, 'grades', i)
+        grades.append([
+            (course_id, rng.randint(40, 100))
+            for course_id in rng.sample(course_ids, min(grades_per_student, len(course_ids)))
+        ])
+    return students, grades
+
+
+def insert_rows(model, fields, rows):
+    """executemany INSERT of plain tuples, skipping model instances entirely"""
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', rows)
+
+
+def write_student_batch(students, grades):
+    """Insert one generated batch; enrollments and grades bypass the ORM
+
+    Building 20M Grade instances costs more than the INSERTs themselves.
+    Nothing is lost by skipping them: the GPA and stats signals do not fire
+    for bulk inserts either, and seed_database() rebuilds both at the end.
+    """
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with transaction.atomic():
+        created = Student.objects.bulk_create([Student(**fields) for fields in students])
+        insert_rows(Enrollment, ['student', 'course', 'date_enrolled'], [
+            (student.pk, course_id, now)
+            for student, student_grades in zip(created, grades) for course_id, _ in student_grades
+        ])
+        insert_rows(Grade, ['student', 'course', 'score', 'date_recorded'], [
+            (student.pk, course_id, score, now)
+            for student, student_grades in zip(created, grades) for course_id, score in student_grades
+        ])
+    return len(created), sum(map(len, grades))
+
+
+def _init_worker():
+    # Spawned workers start without Django set up
+    django.setup()
+
+
+def generate_in_order(jobs, workers):
+    """Yield generate_student_batch(*job) for each job, in order
+
+    At most two batches per worker are in flight, so a writer slower than
+    the generators does not pile up the whole dataset in memory.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield generate_student_batch(*job)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(generate_student_batch, *job))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def seed_database(scale=1.0, seed=0, workers=1, batch_size=SEED_BATCH_SIZE, log=None):
+    """Generate a dataset of seed_sizes(scale) and derive GPAs and stats from it
+
+    Worker processes generate student batches while this process, the
+    only writer (SQLite allows no other), inserts them in batch order. Only
+    generation is parallel; at full scale the INSERTs dominate.
+    """
+    log = log or (lambda message: None)
+    sizes = seed_sizes(scale)
+    departments = seed_departments()
+    seed_teachers(seed, sizes['teachers'], departments, batch_size)
+    log(f"{sizes['teachers']} teachers")
+    seed_courses(seed, sizes['courses'])
+    log(f"{sizes['courses']} courses")
+
+    grades_per_student = sizes['grades'] // sizes['students']
+    course_ids = list(seeded_courses().order_by('code').values_list('pk', flat=True))
+    jobs = [
+        (seed, start, stop, course_ids, grades_per_student)
+        for start, stop in batches(sizes['students'], batch_size)
+    ]
+    for students, grades in generate_in_order(jobs, workers):
+        log('{} students, {} grades'.format(*write_student_batch(students, grades)))
+
+    recompute_gpa(batch_size=batch_size)
+    rebuild_student_stats()
+    bump_data_version()
+    return sizes
+
+
+def clear_seeded_data():
+    """Delete what seed_database() created; other rows are left alone
+
+    Grades, enrollments and students go out as plain DELETEs: the per-row
+    GPA and stats signals would take hours at full scale, and both are
+    rebuilt afterwards anyway.
+    """
+    with transaction.atomic():
+        students = seeded_students()
+        for model in (Grade, Enrollment):
+            rows = model.objects.filter(Q(student__in=students) | Q(course__in=seeded_courses()))
+            rows._raw_delete(rows.db)
+        students._raw_delete(students.db)
+        User.objects.filter(username__startswith=SEED_USER_PREFIX).delete()
+    invalidate_permission_cache()
+    recompute_gpa()
+    rebuild_student_stats()
+    bump_data_version()
@@ -0,0 +1,116 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from teachers.models import Course
+from .gpa import apply_gpa_delta, recompute_gpa, score_to_points
+from .models import Grade, Student
+from .stats import move_student_stats
+from .thumbnails import queue_thumbnails
+from .versioning import bump_data_version
+
+
+def stored_stats_bucket(pk):
+    return Student.objects.filter(pk=pk).values_list(
+        'year', 'gender', 'is_active', 'gpa'
+    ).first()
+
+
+@receiver(pre_save, sender=Student)
+def student_about_to_change(sender, instance, raw=False, **kwargs):
+    # Instances that were not loaded through the ORM (or were loaded with
+    # deferred fields) have no snapshot of their stored bucket yet.
+    if raw or instance._state.adding or getattr(instance, '_loaded_stats_bucket', None):
+        return
+    instance._loaded_stats_bucket = stored_stats_bucket(instance.pk)
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        old_bucket = None if created else getattr(instance, '_loaded_stats_bucket', None)
+        new_bucket = instance.stats_bucket or stored_stats_bucket(instance.pk)
+        move_student_stats(old_bucket, new_bucket)
+        instance._loaded_stats_bucket = instance.stats_bucket
+    bump_data_version()
+
+
+@receiver(post_save, sender=Student)
+def photo_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Partial saves that leave the photo alone, like GPA updates, skip this
+    if raw or (update_fields is not None and 'photo' not in update_fields):
+        return
+    if instance.photo:
+        transaction.on_commit(lambda: queue_thumbnails(instance.photo))
+
+
+@receiver(pre_delete, sender=Student)
+def student_about_to_be_deleted(sender, instance, **kwargs):
+    # The in-memory copy may predate GPA updates made through other instances
+    instance._loaded_stats_bucket = stored_stats_bucket(instance.pk)
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    move_student_stats(instance._loaded_stats_bucket, None)
+    bump_data_version()
+
+
+def course_credit_hours(course_id):
+    """Credit hours every stored grade of the course is counted with
+
+    course_credit_hours_changed() re-weights the sums whenever a course's
+    credit hours are saved, so the stored value is exact. A copy on an
+    instance is not: it may predate such a change, or be an unsaved edit.
+    """
+    return Course.objects.filter(pk=course_id).values_list('credit_hours', flat=True).first() or 0
+
+
+def move_grade_gpa(grade, old_key, new_key):
+    """Take old_key out of and put new_key into the affected students' GPA sums"""
+    if old_key == new_key:
+        return
+    for key, sign in ((old_key, -1), (new_key, 1)):
+        if key is None:
+            continue
+        student_id, course_id, score = key
+        credits = course_credit_hours(course_id)
+        apply_gpa_delta(student_id, sign * score_to_points(score) * credits, sign * credits)
+
+
+@receiver(pre_save, sender=Course)
+def course_about_to_change(sender, instance, raw=False, **kwargs):
+    # Always the stored value: a copy loaded earlier may predate another edit
+    if not raw and not instance._state.adding:
+        instance._stored_credit_hours = course_credit_hours(instance.pk)
+
+
+@receiver(post_save, sender=Course)
+def course_credit_hours_changed(sender, instance, created, raw=False, **kwargs):
+    """Re-weight the GPA of every student graded in a course whose credits changed"""
+    if raw or created:
+        return
+    if instance._stored_credit_hours != instance.credit_hours:
+        student_ids = list(Grade.objects.filter(course=instance).values_list('student_id', flat=True))
+        if student_ids:
+            recompute_gpa(student_ids)
+
+
+@receiver(post_save, sender=Grade)
+def grade_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_key = None if created else getattr(instance, '_loaded_gpa_key', None)
+    if not created and old_key is None:
+        # Not loaded through the ORM: the stored score is unknown, rebuild it
+        recompute_gpa([instance.student_id])
+    else:
+        move_grade_gpa(instance, old_key, instance.gpa_key)
+    instance._loaded_gpa_key = instance.gpa_key
+
+
+@receiver(post_delete, sender=Grade)
+def grade_deleted(sender, instance, origin=None, **kwargs):
+    # Grades cascading from a student delete have no GPA left to maintain
+    if isinstance(origin, Student) or getattr(origin, 'model', None) is Student:
+        return
+    move_grade_gpa(instance, getattr(instance, '_loaded_gpa_key', None) or instance.gpa_key, None)
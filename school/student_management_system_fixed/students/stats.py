@@ -0,0 +1,179 @@
+import time
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from .models import Student, StudentStats
+from .versioning import bump_data_version, get_data_version
+
+
+SUMMARY_CACHE_KEY = 'students:summary'
+SUMMARY_LOCK_KEY = 'students:summary:lock'
+SUMMARY_LOCK_TIMEOUT = 30
+# How long a request without any summary to fall back on waits for the
+# lock holder's result before computing one itself
+SUMMARY_WAIT_TIMEOUT = 2
+SUMMARY_POLL_INTERVAL = 0.02
+
+
+def apply_stats_delta(year, gender, is_active, count, gpa_total):
+    """Add count/gpa_total to one StudentStats bucket with an F() update"""
+    updated = StudentStats.objects.filter(
+        year=year, gender=gender, is_active=is_active
+    ).update(count=F('count') + count, gpa_total=F('gpa_total') + gpa_total)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            StudentStats.objects.create(
+                year=year, gender=gender, is_active=is_active,
+                count=count, gpa_total=gpa_total
+            )
+    except IntegrityError:
+        # Another writer created the bucket first
+        apply_stats_delta(year, gender, is_active, count, gpa_total)
+
+
+def move_student_stats(old_bucket, new_bucket):
+    """Move one student between buckets; either side may be None"""
+    if old_bucket == new_bucket:
+        return
+    if old_bucket is not None:
+        year, gender, is_active, gpa = old_bucket
+        apply_stats_delta(year, gender, is_active, -1, -gpa)
+    if new_bucket is not None:
+        year, gender, is_active, gpa = new_bucket
+        apply_stats_delta(year, gender, is_active, 1, gpa)
+
+
+def bucket_totals(queryset):
+    """Per-bucket (count, gpa_total) of a queryset, one GROUP BY query"""
+    return queryset.order_by().values('year', 'gender', 'is_active').annotate(
+        n=Count('pk'), gpa_sum=Sum('gpa')
+    )
+
+
+def add_queryset_stats(queryset, sign=1):
+    """Count (sign=1) or uncount (sign=-1) every student in queryset
+
+    For bulk paths that bypass model signals: call with sign=-1 before a
+    queryset.update()/delete() and with sign=1 after an update/bulk_create.
+    """
+    for row in bucket_totals(queryset):
+        apply_stats_delta(
+            row['year'], row['gender'], row['is_active'],
+            sign * row['n'], sign * (row['gpa_sum'] or Decimal(0))
+        )
+
+
+def add_students_stats(students):
+    """Count freshly bulk-created Student instances, one update per bucket"""
+    totals = {}
+    for student in students:
+        year, gender, is_active, gpa = student.stats_bucket
+        count, gpa_total = totals.get((year, gender, is_active), (0, Decimal(0)))
+        totals[(year, gender, is_active)] = (count + 1, gpa_total + gpa)
+    for (year, gender, is_active), (count, gpa_total) in totals.items():
+        apply_stats_delta(year, gender, is_active, count, gpa_total)
+
+
+def update_students(queryset, **values):
+    """queryset.update(**values) that keeps the stats counters and data version in step
+
+    Runs a single UPDATE instead of a save() per student, so Student
+    signals do not fire; the affected buckets are uncounted before and
+    recounted after. Returns the number of students updated.
+    """
+    pks = list(queryset.values_list('pk', flat=True))
+    if not pks:
+        return 0
+    students = Student.objects.filter(pk__in=pks)
+    with transaction.atomic():
+        add_queryset_stats(students, sign=-1)
+        updated = students.update(**values)
+        add_queryset_stats(students, sign=1)
+    bump_data_version()
+    return updated
+
+
+def rebuild_student_stats():
+    """Recount every bucket from the Student table"""
+    with transaction.atomic():
+        StudentStats.objects.all().delete()
+        StudentStats.objects.bulk_create([
+            StudentStats(
+                year=row['year'], gender=row['gender'], is_active=row['is_active'],
+                count=row['n'], gpa_total=row['gpa_sum'] or 0
+            )
+            for row in bucket_totals(Student.objects.all())
+        ])
+
+
+def compute_student_summary():
+    """Dashboard statistics read from the StudentStats counters, O(buckets)"""
+    total = active = 0
+    gpa_total = Decimal(0)
+    years = dict.fromkeys((code for code, _ in Student.YEAR_CHOICES), 0)
+    genders = dict.fromkeys((code for code, _ in Student.GENDER_CHOICES), 0)
+
+    for bucket in StudentStats.objects.filter(count__gt=0):
+        total += bucket.count
+        gpa_total += bucket.gpa_total
+        if bucket.is_active:
+            active += bucket.count
+        years[bucket.year] = years.get(bucket.year, 0) + bucket.count
+        genders[bucket.gender] = genders.get(bucket.gender, 0) + bucket.count
+
+    return {
+        'total_students': total,
+        'active_students': active,
+        'inactive_students': total - active,
+        'year_stats': [{'year': code, 'count': n} for code, n in years.items() if n],
+        'gender_stats': [{'gender': code, 'count': n} for code, n in genders.items() if n],
+        'avg_gpa': round(gpa_total / total, 2) if total else 0,
+    }
+
+
+def get_student_summary():
+    """Cached dashboard statistics, revalidated against the data version
+
+    When the version has moved on, only the request that wins the lock
+    recomputes; concurrent requests keep serving the stale summary until
+    the fresh one is stored. With nothing cached yet (a cold start) they
+    poll for the winner's result for up to SUMMARY_WAIT_TIMEOUT instead, so
+    either way a cache miss under load costs one query.
+    """
+    version = get_data_version()
+    cached = cache.get(SUMMARY_CACHE_KEY)
+    if cached is not None and cached['version'] == version:
+        return cached['summary']
+
+    locked = cache.add(SUMMARY_LOCK_KEY, version, timeout=SUMMARY_LOCK_TIMEOUT)
+    if not locked:
+        if cached is not None:
+            return cached['summary']
+        cached = wait_for_summary()
+        if cached is not None:
+            return cached['summary']
+
+    try:
+        summary = compute_student_summary()
+        cache.set(SUMMARY_CACHE_KEY, {'version': version, 'summary': summary}, timeout=None)
+    finally:
+        if locked:
+            cache.delete(SUMMARY_LOCK_KEY)
+    return summary
+
+
+def wait_for_summary():
+    """The summary stored by the lock holder, or None if it gave up or timed out"""
+    deadline = time.monotonic() + SUMMARY_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(SUMMARY_POLL_INTERVAL)
+        cached = cache.get(SUMMARY_CACHE_KEY)
+        if cached is not None:
+            return cached
+        if cache.get(SUMMARY_LOCK_KEY) is None:
+            # Released without storing anything: the computation failed
+            return None
+    return None
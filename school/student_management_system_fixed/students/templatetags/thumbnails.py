@@ -0,0 +1,12 @@
+from django import template
+
+from students.thumbnails import thumbnail_url
+
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(fieldfile, size='avatar'):
+    """{{ student.photo|thumbnail:'profile' }} -> URL of the cached derivative"""
+    return thumbnail_url(fieldfile, size)
@@ -1,3 +1,831 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import io
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import HttpResponse, QueryDict
+from django.core.cache import cache, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from student_management_system.staticfiles import StaticFilesMiddleware, compress_file
+from teachers.models import Course, Department, Teacher
+from .admin import StudentAdmin
+from .benchmark import SCENARIOS, compare, run_benchmarks
+from .forms import StudentForm
+from .filters import STUDENT_ORDERINGS, filter_students
+from .models import Grade, Student, StudentStats
+from .gpa import apply_gpa_delta, recompute_gpa
+from .importers import import_students
+from .querybudget import QueryBudgetExceeded, query_stats
+from .reports import CELL_FONT, CELL_PADDING, REPORT_COL_WIDTHS, REPORT_PRUNE_GRACE, build_students_pdf, clip_row, open_cached_report, rows_per_page
+from .search import fts_available, search_students
+from .seeding import SEED_PASSWORD, batches, clear_seeded_data, generate_student_batch, seed_database
+from .stats import get_student_summary, rebuild_student_stats
+from .thumbnails import THUMBNAIL_SIZES, render_thumbnails, thumbnail_path, thumbnail_url
+from .versioning import bump_data_version, get_data_version
+from .views import student_detail
+
+
+
+def make_course(code='CS101', credit_hours=3, username='teacher', department=None):
+    if department is None:
+        department, _ = Department.objects.get_or_create(code='CS', defaults={'name': 'CS'})
+    teacher = Teacher.objects.filter(user__username=username).first() or Teacher.objects.create(
+        user=User.objects.create_user(username, password='pw'), employee_id=f'T-{username}',
+        department=department, rank='professor', employment_type='full_time',
+        specialization='AI', hire_date=date(2020, 1, 1),
+    )
+    return Course.objects.create(
+        code=code, name=code, credit_hours=credit_hours, department=department,
+        teacher=teacher, semester='1', year=2024,
+    )
+
+
+def pdf_text(data):
+    """Decoded content streams of a ReportLab PDF (ASCII85 + Flate encoded)"""
+    return b''.join(
+        zlib.decompress(base64.a85decode(stream.strip(), adobe=True))
+        for stream in re.findall(rb'stream\r?\n(.*?)endstream', data, re.S)
+    )
+
+
+def student_fields(i=1, **fields):
+    return {
+        'first_name': f'First{i}', 'last_name': f'Last{i}', 'email': f's{i}@example.com',
+        'age': 20, 'gender': 'M', 'student_id': f'S{i:04d}', 'year': '1', **fields,
+    }
+
+
+def make_student(i=1, **fields):
+    return Student.objects.create(**student_fields(i, **fields))
+
+class StudentListQueryPlanTests(TestCase):
+    """The common student_list queries must be served by the Student.Meta indexes"""
+
+    COMMON_QUERIES = [
+        '',
+        'order_by=-first_name',
+        'order_by=age',
+        'order_by=-age',
+        'year=2',
+        'year=2&order_by=-first_name',
+        'is_active=True',
+        'is_active=False&order_by=-first_name',
+        'is_active=True&year=3',
+        'is_active=True&year=3&order_by=-first_name',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        Student.objects.bulk_create([
+            Student(
+                first_name=f'First{i % 7}', last_name=f'Last{i % 5}',
+                email=f'student{i}@example.com', age=18 + i % 10, gender='MF'[i % 2],
+                student_id=f'S{i:04d}', year=str(i % 4 + 1), is_active=i % 3 != 0
+            )
+            for i in range(40)
+        ])
+
+    def test_common_list_queries_avoid_scan_and_temp_sort(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN output is SQLite specific')
+        for query in self.COMMON_QUERIES:
+            with self.subTest(query=query):
+                students, _, _ = filter_students(QueryDict(query))
+                plan = students[:10].explain()
+                self.assertNotIn('TEMP B-TREE', plan)
+                self.assertNotIn('SCAN students_student\n', plan + '\n')
+
+    def test_unknown_ordering_falls_back_to_default(self):
+        students, _, order_by = filter_students(QueryDict('order_by=address'))
+        self.assertEqual(order_by, 'first_name')
+        self.assertEqual(students.query.order_by, ('first_name', 'last_name', 'pk'))
+        self.assertEqual(len(students), 40)
+
+
+class StudentAdminBulkEditTests(TestCase):
+    """Admin bulk edits run one UPDATE per value and keep StudentStats exact"""
+
+    def setUp(self):
+        Student.objects.bulk_create([
+            Student(
+                first_name=f'First{i:02d}', last_name='Last', email=f'student{i}@example.com',
+                age=20, gender='MF'[i % 2], student_id=f'S{i:04d}', year='1', gpa=3
+            )
+            for i in range(20)
+        ])
+        rebuild_student_stats()
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin_user)
+
+    def buckets(self):
+        return sorted(StudentStats.objects.filter(count__gt=0).values_list(
+            'year', 'gender', 'is_active', 'count', 'gpa_total'
+        ))
+
+    def assertStatsMatchTable(self):
+        counted = self.buckets()
+        rebuild_student_stats()
+        self.assertEqual(counted, self.buckets())
+
+    def test_move_to_year_action(self):
+        pks = list(Student.objects.values_list('pk', flat=True)[:5])
+        self.client.post('/admin/students/student/', {
+            'action': 'set_year_4', '_selected_action': pks, 'index': 0,
+        })
+        self.assertEqual(set(Student.objects.filter(year='4').values_list('pk', flat=True)), set(pks))
+        self.assertStatsMatchTable()
+
+    def test_list_editable_save(self):
+        students = list(Student.objects.order_by('first_name', 'last_name', '-pk')[:6])
+        data = {
+            'form-TOTAL_FORMS': len(students), 'form-INITIAL_FORMS': len(students),
+            'form-MIN_NUM_FORMS': 0, 'form-MAX_NUM_FORMS': 1000, '_save': 'Save',
+        }
+        for i, student in enumerate(students):
+            data[f'form-{i}-id'] = student.pk
+            if i % 2:
+                data[f'form-{i}-is_active'] = 'on'
+        response = self.client.post('/admin/students/student/', data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Student.objects.filter(is_active=False).count(), 3)
+        self.assertStatsMatchTable()
+
+
+class StudentStatsSignalTests(TestCase):
+    """Saves and deletes through the ORM move students between StudentStats buckets"""
+
+    def buckets(self):
+        return {
+            (year, gender, is_active): (count, gpa_total)
+            for year, gender, is_active, count, gpa_total in StudentStats.objects.filter(count__gt=0).values_list(
+                'year', 'gender', 'is_active', 'count', 'gpa_total'
+            )
+        }
+
+    def assertBuckets(self, expected):
+        self.assertEqual(self.buckets(), expected)
+        rebuild_student_stats()
+        self.assertEqual(self.buckets(), expected)
+
+    def test_create_update_delete(self):
+        ali = make_student(1, gpa=Decimal('3.00'))
+        make_student(2, gpa=Decimal('2.00'))
+        self.assertBuckets({('1', 'M', True): (2, Decimal('5.00'))})
+
+        ali.year, ali.is_active = '2', False
+        ali.save()
+        self.assertBuckets({('1', 'M', True): (1, Decimal('2.00')), ('2', 'M', False): (1, Decimal('3.00'))})
+
+        # A partial instance re-reads its stored bucket before saving
+        partial = Student.objects.only('pk').get(pk=ali.pk)
+        partial.gender = 'F'
+        partial.save(update_fields=['gender'])
+        self.assertBuckets({('1', 'M', True): (1, Decimal('2.00')), ('2', 'F', False): (1, Decimal('3.00'))})
+
+        # A stale copy is deleted from the bucket the row is in now
+        ali.delete()
+        self.assertBuckets({('1', 'M', True): (1, Decimal('2.00'))})
+        self.assertEqual(get_student_summary()['total_students'], 1)
+
+
+class ConditionalGetTests(TestCase):
+    """Student pages answer 304 from the data version without touching the database"""
+
+    def setUp(self):
+        self.student = Student.objects.create(
+            first_name='Ali', last_name='Omar', email='ali@example.com', age=20,
+            gender='M', student_id='S0001', year='1'
+        )
+
+    def test_unchanged_pages_are_not_modified(self):
+        for url in ['/students/', f'/students/{self.student.pk}/', '/api/stats/']:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_etag(self):
+        url = f'/students/{self.student.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.gpa = 3.5
+            self.student.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class DataVersionTests(TestCase):
+    """The data version moves only once a write has committed, for every process"""
+
+    def test_bumped_on_commit(self):
+        version = get_data_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            make_student()
+            self.assertEqual(get_data_version(), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_data_version(), version)
+
+    def test_other_processes_see_the_stamp(self):
+        bump_data_version()
+        stamp = subprocess.run(
+            [sys.executable, 'manage.py', 'shell', '--no-imports', '-c',
+             'from students.versioning import get_data_version; print(get_data_version())'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        self.assertEqual(stamp, str(get_data_version()))
+
+
+class SeedTests(TestCase):
+    def test_seed_is_deterministic_and_consistent(self):
+        sizes = seed_database(scale=0.01, seed=7, batch_size=4)
+        self.assertEqual(Student.objects.count(), sizes['students'])
+        self.assertEqual(Grade.objects.count(), sizes['grades'])
+        self.assertEqual(Teacher.objects.count(), sizes['teachers'])
+        # Same rows whatever the batching
+        course_ids = list(Course.objects.order_by('code').values_list('pk', flat=True))
+        whole = generate_student_batch(7, 0, sizes['students'], course_ids, 4)
+        halves = [generate_student_batch(7, start, stop, course_ids, 4) for start, stop in batches(sizes['students'], 3)]
+        self.assertEqual(whole[0], [row for half in halves for row in half[0]])
+        self.assertEqual(whole[1], [row for half in halves for row in half[1]])
+
+        stats = lambda: set(StudentStats.objects.filter(count__gt=0).values_list(
+            'year', 'gender', 'is_active', 'count', 'gpa_total'))
+        stored = stats()
+        rebuild_student_stats()
+        self.assertEqual(stored, stats())
+        self.assertTrue(self.client.login(username='seed-teacher0', password=SEED_PASSWORD))
+
+        clear_seeded_data()
+        self.assertFalse(Student.objects.exists())
+        self.assertFalse(Teacher.objects.exists())
+
+
+class StudentExportTests(TestCase):
+    """Exports stream the filtered list with readable choice labels"""
+
+    def setUp(self):
+        make_student(1, first_name='Ali', gender='M', year='1')
+        make_student(2, first_name='Sara', gender='F', year='2', is_active=False)
+
+    def export_rows(self, params=None):
+        response = self.client.get(reverse('export_csv'), params or {})
+        self.assertTrue(response.streaming)
+        return list(csv.reader(line.decode() for line in response.streaming_content))
+
+    def test_csv_streams_labels_that_import_back(self):
+        header, *rows = self.export_rows()
+        self.assertEqual(header[:3], ['Student ID', 'First Name', 'Last Name'])
+        record = dict(zip(header, rows[0]))
+        self.assertEqual(
+            (record['First Name'], record['Gender'], record['Year'], record['Active']),
+            ('Ali', 'ذكر', 'السنة الأولى', 'Yes')
+        )
+        self.assertEqual([row[1] for row in rows], ['Ali', 'Sara'])
+        # Each row is its own chunk rather than one rendered body
+        response = self.client.get(reverse('export_csv'))
+        body = list(response.streaming_content)
+        self.assertEqual(len(body), 3)
+
+        before = list(Student.objects.values_list('student_id', 'gender', 'year', 'is_active'))
+        Student.objects.all().delete()
+        report = import_students(io.BytesIO(b''.join(body)), 'students.csv')
+        self.assertEqual((report.created, report.errors), (2, []))
+        self.assertEqual(list(Student.objects.values_list('student_id', 'gender', 'year', 'is_active')), before)
+
+    def test_exports_follow_the_list_filters(self):
+        _, *rows = self.export_rows({'year': '2', 'order_by': '-first_name'})
+        self.assertEqual([row[1] for row in rows], ['Sara'])
+        _, *rows = self.export_rows({'search_query': 'ali', 'is_active': 'True'})
+        self.assertEqual([row[1] for row in rows], ['Ali'])
+
+        # The list links to the exports with its filters but without paging
+        response = self.client.get(reverse('student_list'), {'year': '2', 'page': '1', 'paginate': 'cursor'})
+        self.assertEqual(QueryDict(response.context['export_query']), QueryDict('year=2'))
+        with tempfile.TemporaryDirectory() as reports, self.settings(REPORT_CACHE_DIR=Path(reports)):
+            pdfs = []
+            for params in ({'year': '1'}, {'year': '2'}, {'year': '2', 'page': '3'}):
+                response = self.client.get(reverse('export_pdf'), params)
+                pdfs.append(b''.join(response.streaming_content))
+                response.close()
+            self.assertIn(b'S0001', pdf_text(pdfs[0]))
+            self.assertNotIn(b'S0002', pdf_text(pdfs[0]))
+            self.assertIn(b'S0002', pdf_text(pdfs[1]))
+            # One report per distinct filter; the page number is not part of it
+            self.assertEqual(len(list(Path(reports).glob('students-*.pdf'))), 2)
+
+
+class StudentReportTests(TestCase):
+    """PDF reports: cached per data version, pruned with a grace period, cells clipped"""
+
+    def setUp(self):
+        reports = tempfile.TemporaryDirectory()
+        self.addCleanup(reports.cleanup)
+        self.reports = Path(reports.name)
+        overrides = self.settings(REPORT_CACHE_DIR=self.reports)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        make_student()
+
+    def open_report(self):
+        report = open_cached_report(Student.objects.all(), QueryDict())
+        self.addCleanup(report.close)
+        return report
+
+    def new_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version()
+
+    def test_rows_are_split_across_pages(self):
+        per_page = rows_per_page(first_page=True), rows_per_page()
+        Student.objects.bulk_create([Student(**student_fields(i)) for i in range(2, sum(per_page) + 2)])
+        output = io.BytesIO()
+        build_students_pdf(Student.objects.order_by('student_id'), output)
+        pdf = output.getvalue()
+        self.assertEqual(len(re.findall(rb'/Type /Page\b', pdf)), 3)
+        text = pdf_text(pdf)
+        self.assertIn(b'Page 3', text)
+        # The single row left over opens the third page
+        self.assertIn(f'S{sum(per_page) + 1:04d}'.encode(), text.split(b'Page 2')[-1])
+
+    def test_rendered_once_per_data_version(self):
+        with mock.patch('students.reports.build_students_pdf', wraps=build_students_pdf) as build:
+            self.open_report()
+            with self.assertNumQueries(0):
+                self.assertTrue(self.open_report().read().startswith(b'%PDF'))
+            self.assertEqual(build.call_count, 1)
+            self.new_version()
+            self.open_report()
+            self.assertEqual(build.call_count, 2)
+
+    def test_reports_of_older_versions_outlive_the_grace_period_and_their_readers(self):
+        old = self.open_report()
+        self.new_version()
+        self.open_report()
+        self.assertTrue(Path(old.name).exists())
+
+        expired = time.time() - REPORT_PRUNE_GRACE - 1
+        os.utime(old.name, (expired, expired))
+        self.new_version()
+        self.open_report()
+        self.assertFalse(Path(old.name).exists())
+        # Opened before the prune, so still readable
+        self.assertTrue(old.read().startswith(b'%PDF'))
+
+    def test_long_cells_are_clipped_to_their_column(self):
+        row = clip_row(['S0001', 'Abdulrahman Mohammed Alqahtani-Benyamin',
+                        'abdulrahman.mohammed.alqahtani@university.example.edu', 'First Year', '3.50', 'Active'])
+        self.assertEqual(row[0], 'S0001')
+        self.assertTrue(row[1].endswith('…') and row[2].endswith('…'))
+        for cell, width in zip(row, REPORT_COL_WIDTHS):
+            self.assertLessEqual(stringWidth(cell, *CELL_FONT), width - CELL_PADDING)
+
+
+class BenchmarkTests(TestCase):
+    def test_every_view_is_measured(self):
+        seed_database(scale=0.02)
+        with tempfile.TemporaryDirectory() as reports, self.settings(REPORT_CACHE_DIR=Path(reports)):
+            results = run_benchmarks(requests=2, warmup=0)
+        self.assertEqual(set(results), {scenario.name for scenario in SCENARIOS})
+        for metrics in results.values():
+            self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'])
+            self.assertGreater(metrics['peak_kib'], 0)
+
+    def test_scenarios_use_whitelisted_orderings(self):
+        # An unknown order_by silently falls back to the default ordering
+        fixture = {'student': 1, 'course': Course(pk=1)}
+        for scenario in SCENARIOS:
+            params = QueryDict(scenario.url(fixture).partition('?')[2])
+            if 'order_by' in params:
+                self.assertIn(params['order_by'], STUDENT_ORDERINGS, scenario.name)
+
+    def test_compare_flags_query_growth_and_slowdowns(self):
+        baseline = {'views': {'dashboard': {'p50_ms': 10, 'p95_ms': 20, 'queries': 2, 'peak_kib': 100}}}
+        within = {'dashboard': {'p50_ms': 12, 'p95_ms': 25, 'p99_ms': 90, 'queries': 2, 'peak_kib': 120}}
+        self.assertEqual(compare(within, baseline, tolerance=0.3), [])
+        worse = {'dashboard': {'p50_ms': 14, 'p95_ms': 25, 'p99_ms': 90, 'queries': 3, 'peak_kib': 120}}
+        self.assertEqual(len(compare(worse, baseline, tolerance=0.3)), 2)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        query_stats.reset()
+        self.student = Student.objects.create(
+            first_name='Ali', last_name='Omar', email='ali@example.com', age=20,
+            gender='M', student_id='S0001', year='1'
+        )
+
+    def test_views_within_budget_are_counted(self):
+        self.client.get(f'/students/{self.student.pk}/')
+        b''.join(self.client.get('/export/csv/').streaming_content)
+        rows = {row['name']: row for row in query_stats.snapshot()}
+        self.assertEqual(rows['student_detail']['budget'], 3)
+        self.assertEqual(rows['student_detail']['violations'], 0)
+        # Counted once the streamed body has been consumed
+        self.assertEqual(rows['export_csv']['queries'], 1)
+
+    def test_over_budget_raises_in_tests_and_logs_otherwise(self):
+        with mock.patch.object(student_detail, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(f'/students/{self.student.pk}/?x=1')
+            with self.settings(QUERY_BUDGET_STRICT=False), self.assertLogs('students.querybudget', 'WARNING'):
+                self.assertEqual(self.client.get(f'/students/{self.student.pk}/?x=2').status_code, 200)
+        self.assertEqual(query_stats.snapshot()[0]['violations'], 2)
+
+    def test_diagnostics_page_is_staff_only(self):
+        self.client.get('/students/')
+        self.assertEqual(self.client.get('/diagnostics/queries/').status_code, 302)
+        staff = User.objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get('/diagnostics/queries/')
+        self.assertContains(response, 'student_list')
+
+
+
+class GradeGpaTests(TestCase):
+    """Running GPA sums follow every grade write and course credit change"""
+
+    def setUp(self):
+        self.student = make_student()
+        self.math = make_course('MATH1', credit_hours=3)
+        self.physics = make_course('PHYS1', credit_hours=4)
+
+    def assertGpa(self, points, credits, gpa):
+        self.student.refresh_from_db()
+        stored = (self.student.grade_points_total, self.student.credit_hours_total, self.student.gpa)
+        self.assertEqual(stored, (Decimal(points), credits, Decimal(gpa)))
+        # Same as rebuilding from the transcript
+        recompute_gpa([self.student.pk])
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.grade_points_total, self.student.credit_hours_total, self.student.gpa), stored)
+
+    def test_create_update_delete(self):
+        Grade.objects.create(student=self.student, course=self.math, score=95)
+        physics = Grade.objects.create(student=self.student, course=self.physics, score=70)
+        self.assertGpa('20.00', 7, '2.86')
+        physics.score = 90
+        physics.save()
+        self.assertGpa('27.00', 7, '3.86')
+        Grade.objects.get(course=self.math).delete()
+        self.assertGpa('15.00', 4, '3.75')
+
+    def test_credit_hours_change_reweights_and_later_writes_stay_exact(self):
+        Grade.objects.create(student=self.student, course=self.math, score=95)
+        physics = Grade.objects.create(student=self.student, course=self.physics, score=70)
+        stale_course = Course.objects.get(pk=self.physics.pk)
+        self.physics.credit_hours = 2
+        self.physics.save()
+        self.assertGpa('16.00', 5, '3.20')
+        # Instances loaded before the change still subtract the right weight
+        physics.score = 90
+        physics.save()
+        self.assertGpa('19.50', 5, '3.90')
+        stale_course.name = 'Physics'
+        stale_course.save()
+        self.assertGpa('27.00', 7, '3.86')
+        physics.delete()
+        self.assertGpa('12.00', 3, '4.00')
+
+    def test_removing_the_last_grade_resets_the_gpa(self):
+        Grade.objects.create(student=self.student, course=self.math, score=95)
+        Grade.objects.get().delete()
+        self.assertGpa('0.00', 0, '0.00')
+        # recompute_gpa also clears a GPA left behind by a removed transcript
+        Student.objects.filter(pk=self.student.pk).update(grade_points_total=12, credit_hours_total=3, gpa=4)
+        recompute_gpa([self.student.pk])
+        self.assertGpa('0.00', 0, '0.00')
+
+    def test_gpa_cannot_be_edited_by_hand(self):
+        Grade.objects.create(student=self.student, course=self.physics, score=90)
+        self.assertNotIn('gpa', StudentForm().fields)
+        self.assertIn('gpa', StudentAdmin(Student, admin.site).get_readonly_fields(None))
+        self.assertGpa('15.00', 4, '3.75')
+
+
+class StudentSearchIndexTests(TestCase):
+    """The FTS5 mirror follows inserts and renames, and only those"""
+
+    def setUp(self):
+        self.student = make_student(first_name='Ahmed', last_name='Rashid', student_id='S0001')
+
+    def search(self, query):
+        return list(search_students(Student.objects.all(), query))
+
+    def total_changes(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT total_changes()')
+            before = cursor.fetchone()[0]
+            cursor.execute(sql, params)
+            cursor.execute('SELECT total_changes()')
+            return cursor.fetchone()[0] - before
+
+    def test_insert_rename_and_prefix_match(self):
+        self.assertTrue(fts_available())
+        self.assertEqual(self.search('ahm'), [self.student])
+        self.assertEqual(self.search('Ahmed Ras'), [self.student])
+        self.assertEqual(self.search('S00'), [self.student])
+        # Word prefixes only, unlike icontains
+        self.assertEqual(self.search('hmed'), [])
+        self.student.first_name = 'Khalid'
+        self.student.save()
+        self.assertEqual(self.search('ahmed'), [])
+        self.assertEqual(self.search('khal'), [self.student])
+
+    def test_non_indexed_updates_leave_the_index_alone(self):
+        # total_changes() counts rows written by triggers too
+        self.assertEqual(self.total_changes(
+            'UPDATE students_student SET gpa = 3, is_active = 0 WHERE id = %s', [self.student.pk]
+        ), 1)
+        self.assertGreater(self.total_changes(
+            "UPDATE students_student SET last_name = 'Omar' WHERE id = %s", [self.student.pk]
+        ), 1)
+        self.assertEqual(self.search('omar'), [self.student])
+
+    def test_cursor_pages_of_a_ranked_search(self):
+        # Different bm25 ranks, with ties, across more than one page
+        for i in range(2, 14):
+            make_student(i, first_name='Ahmed', last_name='Ahmed' if i % 3 else f'Last{i}')
+        make_student(99, first_name='Omar')
+        seen, query = [], {'search_query': 'ahmed', 'paginate': 'cursor'}
+        while True:
+            response = self.client.get(reverse('student_list'), query)
+            self.assertEqual(response.status_code, 200)
+            seen += list(response.context['page_obj'])
+            if not response.context['next_query']:
+                break
+            query = QueryDict(response.context['next_query'])
+        ranked = search_students(Student.objects.all(), 'ahmed', ranked=True)
+        self.assertEqual(seen, list(ranked.order_by('search_rank', 'first_name', 'last_name', 'pk')))
+        self.assertEqual(len(seen), 13)
+
+
+class StudentSummaryCacheTests(SimpleTestCase):
+    """Concurrent dashboard requests recompute the summary once per data version"""
+
+    def setUp(self):
+        cache.clear()
+
+    def concurrent_summaries(self, compute, n=8):
+        barrier = threading.Barrier(n)
+        results = []
+
+        def request():
+            barrier.wait()
+            results.append(get_student_summary())
+
+        with mock.patch('students.stats.compute_student_summary', side_effect=compute):
+            threads = [threading.Thread(target=request) for _ in range(n)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return results
+
+    def slow_summary(self, calls):
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'total_students': len(calls)}
+        return compute
+
+    def test_one_recompute_per_version_even_when_cold(self):
+        calls = []
+        results = self.concurrent_summaries(self.slow_summary(calls))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'total_students': 1}] * 8)
+
+        bump_data_version()
+        results = self.concurrent_summaries(self.slow_summary(calls))
+        self.assertEqual(len(calls), 2)
+        # Losers serve the previous summary while the winner recomputes
+        self.assertLessEqual({result['total_students'] for result in results}, {1, 2})
+        self.assertEqual(get_student_summary(), {'total_students': 2})
+
+
+class StudentImportTests(TestCase):
+    """Batched import: per-row errors, duplicates in the table and across batches"""
+
+    CSV = (
+        'Student ID,First Name,Last Name,Email,Age,Gender,Year,GPA,Active\n'
+        'S0100,Ali,Omar,ali@example.com,20,ذكر,السنة الأولى,3.5,Yes\n'
+        'S0001,Taken,Id,new@example.com,20,M,1,3,Yes\n'
+        'S0101,Sara,Ali,sara@example.com,,F,2,3,No\n'
+        'S0102,Huda,Nour,huda@example.com,21,F,السنة الثانية,2.5,No\n'
+        'S0103,Again,Ali,ali@example.com,22,M,3,2,Yes\n'
+        'S0104,Omar,Khalid,omar@example.com,23,M,4,,yes\n'
+    )
+
+    def setUp(self):
+        make_student(1)
+
+    def run_import(self, **options):
+        return import_students(io.BytesIO(self.CSV.encode()), 'students.csv', batch_size=2, **options)
+
+    def test_valid_rows_are_created_and_bad_rows_reported(self):
+        report = self.run_import()
+        self.assertEqual(report.created, 3)
+        self.assertEqual([row for row, _ in report.errors], [3, 4, 6])
+        self.assertIn('student_id', report.errors[0][1][0])
+        self.assertIn('age', report.errors[1][1][0])
+        # Duplicate of a row imported in an earlier batch
+        self.assertIn('email', report.errors[2][1][0])
+        ali = Student.objects.get(student_id='S0100')
+        self.assertEqual((ali.gender, ali.year, ali.is_active), ('M', '1', True))
+        self.assertFalse(Student.objects.get(student_id='S0102').is_active)
+        counted = set(StudentStats.objects.values_list('year', 'gender', 'is_active', 'count', 'gpa_total'))
+        rebuild_student_stats()
+        self.assertEqual(counted, set(StudentStats.objects.values_list('year', 'gender', 'is_active', 'count', 'gpa_total')))
+
+    def test_queries_grow_with_batches_not_rows(self):
+        csv_text = self.CSV.splitlines(keepends=True)[0] + ''.join(
+            f'S{i:05d},First,Last,bulk{i}@example.com,20,M,1,3,Yes\n' for i in range(500)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            report = import_students(io.BytesIO(csv_text.encode()), 'students.csv', batch_size=250)
+        self.assertEqual(report.created, 500)
+        # Two uniqueness lookups, one bulk INSERT and the stats upserts per batch
+        self.assertLess(len(queries), 30)
+
+    def test_dry_run_writes_nothing(self):
+        report = self.run_import(dry_run=True)
+        self.assertEqual((report.created, report.failed), (3, 3))
+        self.assertEqual(Student.objects.count(), 1)
+
+    def test_encoding_error_part_way_keeps_earlier_batches(self):
+        data = self.CSV.encode() + 'S0105,Zoé,Roy,zoe@example.com,20,F,1,3,Yes\n'.encode('latin-1')
+        report = import_students(io.BytesIO(data), 'students.csv', batch_size=2)
+        self.assertEqual(report.created, 3)
+        self.assertEqual(report.errors[-1][0], 8)
+        self.assertIn('Line 8 is not UTF-8', report.errors[-1][1][0])
+
+    def test_unreadable_upload_is_a_form_error(self):
+        uploads = [
+            SimpleUploadedFile('students.csv', 'Prénom,Âge\n'.encode('latin-1')),
+            SimpleUploadedFile('students.xlsx', b'not a workbook'),
+        ]
+        for upload in uploads:
+            with self.subTest(upload=upload.name):
+                response = self.client.post(reverse('student_import'), {'file': upload})
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.context['form'].errors['file'])
+                self.assertIsNone(response.context['report'])
+        self.assertEqual(Student.objects.count(), 1)
+
+
+class StudentThumbnailTests(TestCase):
+    """Photos get content-addressed square derivatives served as immutable files"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        overrides = self.settings(MEDIA_ROOT=media.name, THUMBNAIL_ROOT=Path(media.name) / 'thumbnails')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        cache.clear()
+        self.photo = Path(media.name) / 'photo.png'
+        Image.new('RGB', (400, 200), 'red').save(self.photo)
+
+    def test_every_size_is_rendered_once(self):
+        filenames = render_thumbnails(self.photo)
+        self.assertEqual(set(filenames), set(THUMBNAIL_SIZES))
+        for size, name in filenames.items():
+            self.assertRegex(name, rf'^[0-9a-f]{{20}}-{size}\.jpg$')
+            with Image.open(thumbnail_path(name)) as thumb:
+                self.assertEqual(thumb.size, (THUMBNAIL_SIZES[size],) * 2)
+        with mock.patch('students.thumbnails.Image.open') as image_open:
+            self.assertEqual(render_thumbnails(self.photo), filenames)
+        image_open.assert_not_called()
+
+    def test_thumbnail_url_serves_an_immutable_jpeg(self):
+        student = make_student(photo=SimpleUploadedFile('photo.png', self.photo.read_bytes()))
+        url = thumbnail_url(student.photo, 'avatar')
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+        b''.join(response.streaming_content)
+        response.close()
+        # Same content, same name: a re-upload reuses the derivatives
+        copy = make_student(2, photo=SimpleUploadedFile('again.png', self.photo.read_bytes()))
+        self.assertEqual(thumbnail_url(copy.photo, 'avatar'), url)
+
+    def test_saves_that_leave_the_photo_alone_queue_nothing(self):
+        student = make_student(photo=SimpleUploadedFile('photo.png', self.photo.read_bytes()))
+        with mock.patch('students.signals.queue_thumbnails') as queue:
+            with self.captureOnCommitCallbacks(execute=True):
+                apply_gpa_delta(student.pk, Decimal('12'), 3)
+                student.save(update_fields=['first_name'])
+            queue.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                student.save(update_fields=['photo'])
+            queue.assert_called_once_with(student.photo)
+
+    def test_unknown_or_malformed_names_are_not_found(self):
+        for filename in ('0123456789abcdef0123-avatar.jpg', 'photo.png'):
+            with self.subTest(filename=filename):
+                self.assertEqual(self.client.get(reverse('thumbnail', args=[filename])).status_code, 404)
+
+
+class StaticFilesMiddlewareTests(SimpleTestCase):
+    """Collected assets are served precompressed with validators"""
+
+    CSS = b'body { color: #333; }\n' * 200
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        css = Path(root.name) / 'css' / 'app.css'
+        css.parent.mkdir()
+        css.write_bytes(self.CSS)
+        compress_file(str(css))
+        overrides = self.settings(STATIC_ROOT=root.name, STATIC_URL='static/')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.middleware = StaticFilesMiddleware(lambda request: HttpResponse('app'))
+
+    def get(self, path='/static/css/app.css', **headers):
+        return self.middleware(RequestFactory().get(path, headers=headers))
+
+    def body(self, response):
+        content = b''.join(response.streaming_content)
+        response.close()
+        return content
+
+    def test_gzip_is_served_when_accepted(self):
+        response = self.get(accept_encoding='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(self.body(response)), self.CSS)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+
+        identity = self.get(accept_encoding='gzip;q=0')
+        self.assertFalse(identity.has_header('Content-Encoding'))
+        self.assertEqual(self.body(identity), self.CSS)
+        self.assertNotEqual(identity['ETag'], response['ETag'])
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.get(accept_encoding='gzip')
+        self.body(response)
+        self.assertEqual(self.get(accept_encoding='gzip', if_none_match=response['ETag']).status_code, 304)
+        # The identity representation has its own validator
+        identity = self.get(if_none_match=response['ETag'])
+        self.body(identity)
+        self.assertEqual(identity.status_code, 200)
+
+    def test_other_paths_fall_through(self):
+        self.assertEqual(self.get('/static/css/missing.css').content, b'app')
+        with self.settings(STATIC_ROOT='/nonexistent'), self.assertRaises(MiddlewareNotUsed):
+            StaticFilesMiddleware(lambda request: HttpResponse('app'))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'fragment-tests'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'fragment-tests-fragments'},
+    'versions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'fragment-tests-versions'},
+})
+class TemplateFragmentCacheTests(TestCase):
+    """Layout fragments are rendered once per key and re-keyed when their inputs change"""
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['fragments'].clear()
+
+    def test_sidebar_is_cached_per_page(self):
+        response = self.client.get(reverse('dashboard'))
+        language = response.context['LANGUAGE_CODE']
+        key = make_template_fragment_key('sidebar', [language, 'dashboard'])
+        self.assertIn('nav-link active', caches['fragments'].get(key))
+        caches['fragments'].set(key, '<nav>cached sidebar</nav>')
+        self.assertContains(self.client.get(reverse('dashboard')), 'cached sidebar')
+        # The active link differs per page, so another page renders its own
+        self.assertNotContains(self.client.get(reverse('student_list')), 'cached sidebar')
+        self.assertIsNotNone(caches['fragments'].get(make_template_fragment_key('sidebar', [language, 'student_list'])))
+
+    def test_dashboard_stats_follow_the_data_version(self):
+        self.assertContains(self.client.get(reverse('dashboard')), '<div class="stats-number">0</div>')
+        with self.captureOnCommitCallbacks(execute=True):
+            make_student()
+        self.assertContains(self.client.get(reverse('dashboard')), '<div class="stats-number">1</div>')
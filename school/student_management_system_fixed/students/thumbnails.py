@@ -0,0 +1,112 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+# Square crops, twice the largest size they are displayed at
+THUMBNAIL_SIZES = {
+    'avatar': 80,
+    'profile': 300,
+}
+THUMBNAIL_QUALITY = 85
+THUMBNAIL_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+THUMBNAIL_WORKERS = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def thumbnail_filename(digest, size):
+    return f'{digest}-{size}.jpg'
+
+
+def thumbnail_path(filename):
+    return os.path.join(settings.THUMBNAIL_ROOT, filename)
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            sha.update(chunk)
+    return sha.hexdigest()[:20]
+
+
+def render_thumbnails(path):
+    """Write every size of the image at path, return {size: filename}
+
+    Derivatives are named after the original's content hash, so they never
+    change once written and a re-uploaded identical photo reuses them. No
+    database access: the backfill command runs this in worker processes.
+    """
+    digest = file_digest(path)
+    filenames = {size: thumbnail_filename(digest, size) for size in THUMBNAIL_SIZES}
+    missing = {size: name for size, name in filenames.items() if not os.path.exists(thumbnail_path(name))}
+    if missing:
+        os.makedirs(settings.THUMBNAIL_ROOT, exist_ok=True)
+        with Image.open(path) as original:
+            image = ImageOps.exif_transpose(original).convert('RGB')
+        for size, name in missing.items():
+            pixels = THUMBNAIL_SIZES[size]
+            thumb = ImageOps.fit(image, (pixels, pixels), Image.Resampling.LANCZOS)
+            target = thumbnail_path(name)
+            tmp = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+            thumb.save(tmp, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+            os.replace(tmp, target)
+    return filenames
+
+
+def cache_key(name):
+    return f'thumbnails:{name}'
+
+
+def remember_thumbnails(name, filenames):
+    cache.set(cache_key(name), filenames, THUMBNAIL_CACHE_TIMEOUT)
+
+
+def ensure_thumbnails(fieldfile):
+    """{size: filename} for an ImageField file, rendering it on first use"""
+    filenames = cache.get(cache_key(fieldfile.name))
+    if filenames is None or not os.path.exists(thumbnail_path(next(iter(filenames.values())))):
+        filenames = render_thumbnails(fieldfile.path)
+        remember_thumbnails(fieldfile.name, filenames)
+    return filenames
+
+
+def thumbnail_url(fieldfile, size):
+    """URL of a derivative, falling back to the original if it cannot be made"""
+    if not fieldfile:
+        return ''
+    try:
+        filenames = ensure_thumbnails(fieldfile)
+    except (OSError, ValueError):
+        logger.exception("Could not make thumbnails of %s", fieldfile.name)
+        return fieldfile.url
+    return reverse('thumbnail', args=[filenames[size]])
+
+
+def _render_in_background(name, path):
+    try:
+        remember_thumbnails(name, render_thumbnails(path))
+    except (OSError, ValueError):
+        logger.exception("Could not make thumbnails of %s", name)
+
+
+def queue_thumbnails(fieldfile):
+    """Render the derivatives of a fresh upload on a worker thread"""
+    global _executor
+    if not fieldfile or cache.get(cache_key(fieldfile.name)) is not None:
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+    _executor.submit(_render_in_background, fieldfile.name, fieldfile.path)
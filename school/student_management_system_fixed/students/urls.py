@@ -9,6 +9,7 @@ urlpatterns = [
     path('students/', views.student_list, name='student_list'),
     path('students/<int:pk>/', views.student_detail, name='student_detail'),
     path('students/create/', views.student_create, name='student_create'),
+    path('students/import/', views.student_import, name='student_import'),
     path('students/<int:pk>/update/', views.student_update, name='student_update'),
     path('students/<int:pk>/delete/', views.student_delete, name='student_delete'),
     
@@ -21,5 +22,11 @@ urlpatterns = [
     
     # AJAX endpoints
     path('api/stats/', views.get_student_stats, name='student_stats'),
+    
+    # Internal diagnostics
+    path('diagnostics/queries/', views.query_diagnostics, name='query_diagnostics'),
+    
+    # Photo thumbnails
+    path('thumbnails/<str:filename>', views.thumbnail, name='thumbnail'),
 ]
 
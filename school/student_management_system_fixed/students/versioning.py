@@ -0,0 +1,58 @@
+import time
+from django.core.cache import caches
+from django.db import transaction
+
+
+DATA_VERSION_KEY = 'students:data_version'
+# Stamps must be shared by every process: management commands (imports,
+# GPA recomputes, seeding) invalidate what the server processes cached.
+VERSION_CACHE_ALIAS = 'versions'
+
+# Version stamp of each model, bumped by every write path of that model.
+# The student tables share the data version: Student signals, bulk imports,
+# admin bulk edits and GPA recomputes all bump it.
+MODEL_VERSION_KEYS = {
+    'students.student': DATA_VERSION_KEY,
+}
+
+
+def _new_version():
+    # Time based rather than a counter, so a cold cache after a restart can
+    # never hand out a stamp that was already used for older data.
+    return time.time_ns()
+
+
+def get_version(key):
+    """Current version stamp stored under key, created on first use"""
+    cache = caches[VERSION_CACHE_ALIAS]
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(key):
+    """Invalidate everything keyed by the current stamp under key
+
+    The new stamp is stored once the surrounding transaction commits (at
+    once outside one). Stored earlier, a concurrent request could read it,
+    compute from the still uncommitted data and cache that under the new
+    stamp until the next write.
+    """
+    transaction.on_commit(lambda: caches[VERSION_CACHE_ALIAS].set(key, _new_version(), timeout=None))
+
+
+def model_version_key(model):
+    return MODEL_VERSION_KEYS[model._meta.label_lower]
+
+
+def get_data_version():
+    """Current data-version stamp of the student tables"""
+    return get_version(DATA_VERSION_KEY)
+
+
+def bump_data_version():
+    """Invalidate everything keyed by the current data version"""
+    bump_version(DATA_VERSION_KEY)
@@ -1,95 +1,66 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.core.paginator import Paginator
-from django.db.models import Q, Count, Avg
-from django.http import JsonResponse, HttpResponse
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse, FileResponse, Http404
+from django.utils.cache import patch_cache_control
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
+from shared.pagination import CursorPaginator, InvalidCursor
 from .models import Student
-from .forms import StudentForm, StudentSearchForm
+from .forms import StudentForm, StudentImportUploadForm
+from .decorators import condition_on_models, query_budget
+from .filters import filter_students, export_query_string, cursor_query_string
+from .importers import ImportFileError, import_students
+from .querybudget import query_stats
+from .reports import open_cached_report
+from .stats import get_student_summary
+from .thumbnails import thumbnail_path
 import csv
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
+import os
+import re
 
 # Dashboard View
+@query_budget(3)
 def dashboard(request):
     """Dashboard with statistics and charts"""
-    total_students = Student.objects.count()
-    active_students = Student.objects.filter(is_active=True).count()
-    inactive_students = total_students - active_students
-    
-    # Year distribution
-    year_stats = Student.objects.values('year').annotate(count=Count('year')).order_by('year')
-    
-    # Gender distribution
-    gender_stats = Student.objects.values('gender').annotate(count=Count('gender'))
-    
-    # Average GPA
-    avg_gpa = Student.objects.aggregate(avg_gpa=Avg('gpa'))['avg_gpa'] or 0
-    
-    context = {
-        'total_students': total_students,
-        'active_students': active_students,
-        'inactive_students': inactive_students,
-        'year_stats': year_stats,
-        'gender_stats': gender_stats,
-        'avg_gpa': round(avg_gpa, 2),
-    }
+    context = get_student_summary()
     return render(request, 'students/dashboard.html', context)
 
 # List all students with search and filters
+@condition_on_models(Student)
+@query_budget(3)
 def student_list(request):
     """Display all students with search and filtering capabilities"""
-    students = Student.objects.all()
-    search_form = StudentSearchForm(request.GET)
-    
-    # Apply search filters
-    if search_form.is_valid():
-        search_query = search_form.cleaned_data.get('search_query')
-        year = search_form.cleaned_data.get('year')
-        gender = search_form.cleaned_data.get('gender')
-        is_active = search_form.cleaned_data.get('is_active')
-        
-        if search_query:
-            students = students.filter(
-                Q(first_name__icontains=search_query) |
-                Q(last_name__icontains=search_query) |
-                Q(email__icontains=search_query) |
-                Q(student_id__icontains=search_query)
-            )
-        
-        if year:
-            students = students.filter(year=year)
-            
-        if gender:
-            students = students.filter(gender=gender)
-            
-        if is_active:
-            students = students.filter(is_active=is_active == 'True')
-    
-    # Ordering (from QuerySet examples)
-    order_by = request.GET.get('order_by', 'first_name')
-    if order_by.startswith('-'):
-        students = students.order_by(order_by)
+    students, search_form, order_by = filter_students(request.GET)
+    
+    # Pagination: keyset cursors when requested, page numbers otherwise
+    cursor_mode = request.GET.get('paginate') == 'cursor' or 'cursor' in request.GET
+    if cursor_mode:
+        try:
+            page_obj = CursorPaginator(students, 10).page(request.GET.get('cursor'))
+        except InvalidCursor:
+            page_obj = CursorPaginator(students, 10).page()
     else:
-        students = students.order_by(order_by)
-    
-    # Pagination
-    paginator = Paginator(students, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        paginator = Paginator(students, 10)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
     
     context = {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'next_query': cursor_query_string(request.GET, page_obj.next_cursor) if cursor_mode and page_obj.has_next else '',
+        'previous_query': cursor_query_string(request.GET, page_obj.previous_cursor) if cursor_mode and page_obj.has_previous else '',
         'search_form': search_form,
         'current_order': order_by,
+        'export_query': export_query_string(request.GET),
     }
     return render(request, 'students/student_list.html', context)
 
 # Student detail view
+@condition_on_models(Student)
+@query_budget(3)
 def student_detail(request, pk):
     """Display single student details"""
     student = get_object_or_404(Student, pk=pk)
@@ -132,6 +103,33 @@ def student_update(request, pk):
         'title': f'Update {student.full_name}'
     })
 
+# Bulk import students
+IMPORT_ERRORS_SHOWN = 100
+
+def student_import(request):
+    """Import many students at once from an uploaded CSV/XLSX file"""
+    report = None
+    if request.method == 'POST':
+        form = StudentImportUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                report = import_students(upload.file, upload.name)
+            except ImportFileError as exc:
+                form.add_error('file', str(exc))
+            else:
+                messages.success(request, f'{report.created} students have been imported successfully!')
+                if report.failed:
+                    messages.warning(request, f'{report.failed} rows were rejected.')
+    else:
+        form = StudentImportUploadForm()
+    
+    return render(request, 'students/student_import.html', {
+        'form': form,
+        'report': report,
+        'errors': report.errors[:IMPORT_ERRORS_SHOWN] if report else [],
+    })
+
 # Delete student
 def student_delete(request, pk):
     """Delete student"""
@@ -187,88 +185,101 @@ def advanced_queries(request):
     return render(request, 'students/advanced_queries.html', context)
 
 # Export to CSV
-def export_csv(request):
-    """Export students data to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="students.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
+class Echo:
+    """File-like object that hands each written CSV row straight back"""
+    def write(self, value):
+        return value
+
+
+CSV_EXPORT_FIELDS = [
+    'student_id', 'first_name', 'last_name', 'email', 'phone',
+    'age', 'gender', 'year', 'gpa', 'date_enrolled', 'is_active'
+]
+CSV_EXPORT_CHUNK_SIZE = 2000
+
+
+def iter_students_csv(students):
+    """Yield CSV lines for the given queryset without holding it in memory"""
+    writer = csv.writer(Echo())
+    gender_labels = dict(Student.GENDER_CHOICES)
+    year_labels = dict(Student.YEAR_CHOICES)
+
+    yield writer.writerow([
         'Student ID', 'First Name', 'Last Name', 'Email', 'Phone',
         'Age', 'Gender', 'Year', 'GPA', 'Date Enrolled', 'Active'
     ])
-    
-    students = Student.objects.all()
-    for student in students:
-        writer.writerow([
-            student.student_id,
-            student.first_name,
-            student.last_name,
-            student.email,
-            student.phone,
-            student.age,
-            student.get_gender_display(),
-            student.get_year_display(),
-            student.gpa,
-            student.date_enrolled,
-            'Yes' if student.is_active else 'No'
+
+    rows = students.values_list(*CSV_EXPORT_FIELDS).iterator(chunk_size=CSV_EXPORT_CHUNK_SIZE)
+    for (student_id, first_name, last_name, email, phone,
+         age, gender, year, gpa, date_enrolled, is_active) in rows:
+        yield writer.writerow([
+            student_id,
+            first_name,
+            last_name,
+            email,
+            phone,
+            age,
+            gender_labels.get(gender, gender),
+            year_labels.get(year, year),
+            gpa,
+            date_enrolled,
+            'Yes' if is_active else 'No'
         ])
-    
+
+
+@query_budget(2)
+def export_csv(request):
+    """Export the currently filtered students to CSV, streamed row by row"""
+    students, _, _ = filter_students(request.GET)
+    response = StreamingHttpResponse(
+        iter_students_csv(students),
+        content_type='text/csv'
+    )
+    response['Content-Disposition'] = 'attachment; filename="students.csv"'
     return response
 
 # Export to PDF
+@query_budget(2)
 def export_pdf(request):
-    """Export students data to PDF"""
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="students.pdf"'
-    
-    doc = SimpleDocTemplate(response, pagesize=letter)
-    elements = []
-    
-    # Title
-    styles = getSampleStyleSheet()
-    title = Paragraph("Students Report", styles['Title'])
-    elements.append(title)
-    
-    # Table data
-    data = [['ID', 'Name', 'Email', 'Year', 'GPA', 'Status']]
-    students = Student.objects.all()
-    
-    for student in students:
-        data.append([
-            student.student_id,
-            student.full_name,
-            student.email,
-            student.get_year_display(),
-            str(student.gpa),
-            'Active' if student.is_active else 'Inactive'
-        ])
-    
-    # Create table
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    return response
+    """Export the currently filtered students to PDF"""
+    students, _, _ = filter_students(request.GET)
+    return FileResponse(
+        open_cached_report(students, request.GET),
+        as_attachment=True,
+        filename='students.pdf',
+        content_type='application/pdf'
+    )
 
 # AJAX views for dynamic content
+@condition_on_models(Student)
+@query_budget(2)
 def get_student_stats(request):
     """Return student statistics as JSON for charts"""
-    year_stats = list(Student.objects.values('year').annotate(count=Count('year')))
-    gender_stats = list(Student.objects.values('gender').annotate(count=Count('gender')))
+    summary = get_student_summary()
     
     return JsonResponse({
-        'year_stats': year_stats,
-        'gender_stats': gender_stats
+        'year_stats': summary['year_stats'],
+        'gender_stats': summary['gender_stats']
     })
+
+# Photo thumbnails, named after the original's content hash
+THUMBNAIL_NAME = re.compile(r'[0-9a-f]{20}-[a-z]+\.jpg')
+THUMBNAIL_MAX_AGE = 60 * 60 * 24 * 365
+
+def thumbnail(request, filename):
+    """Serve a thumbnail; its name changes with its content, so it never expires"""
+    path = thumbnail_path(filename)
+    if not THUMBNAIL_NAME.fullmatch(filename) or not os.path.exists(path):
+        raise Http404
+    response = FileResponse(open(path, 'rb'), content_type='image/jpeg')
+    patch_cache_control(response, public=True, max_age=THUMBNAIL_MAX_AGE, immutable=True)
+    return response
+
+# Internal: queries and SQL time per URL name, counted by QueryBudgetMiddleware
+@staff_member_required
+def query_diagnostics(request):
+    """Per-view query totals of this process, worst SQL time first"""
+    if request.method == 'POST':
+        query_stats.reset()
+        return redirect('query_diagnostics')
+    return render(request, 'students/query_diagnostics.html', {'rows': query_stats.snapshot()})
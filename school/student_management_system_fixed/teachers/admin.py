@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
+from students.changelists import AutocompleteFilter, FastChangeListMixin
 from .models import Department, Teacher, Course, TeacherPermissionLog
 
 @admin.register(Department)
@@ -20,12 +21,12 @@ class DepartmentAdmin(admin.ModelAdmin):
     )
 
 @admin.register(Teacher)
-class TeacherAdmin(admin.ModelAdmin):
+class TeacherAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = [
         'full_name', 'employee_id', 'department', 'rank', 
         'employment_type', 'is_active', 'hire_date'
     ]
-    list_filter = ['department', 'rank', 'employment_type', 'is_active', 'hire_date']
+    list_filter = [('department', AutocompleteFilter), 'rank', 'employment_type', 'is_active', 'hire_date']
     search_fields = ['user__first_name', 'user__last_name', 'employee_id', 'specialization']
     ordering = ['user__first_name', 'user__last_name']
     readonly_fields = ['date_created', 'date_updated']
@@ -60,9 +61,9 @@ class TeacherAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user', 'department')
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
+class CourseAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ['code', 'name', 'department', 'teacher', 'credit_hours', 'semester', 'year', 'is_active']
-    list_filter = ['department', 'teacher', 'semester', 'year', 'is_active']
+    list_filter = [('department', AutocompleteFilter), ('teacher', AutocompleteFilter), 'semester', 'year', 'is_active']
     search_fields = ['code', 'name', 'teacher__user__first_name', 'teacher__user__last_name']
     ordering = ['code']
     
@@ -0,0 +1,178 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import TeacherPermissionLog
+
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = 100
+AUDIT_FLUSH_INTERVAL = 0.5  # seconds
+AUDIT_FLUSH_TIMEOUT = 10  # seconds
+AUDIT_SHUTDOWN_TIMEOUT = 5  # seconds
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_FIELDS = ['id', 'teacher_id', 'action', 'permission', 'timestamp', 'ip_address']
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class AuditWriter:
+    """Queue TeacherPermissionLog entries and insert them in batches
+
+    A daemon thread writes with bulk_create whenever batch_size entries are
+    waiting or flush_interval seconds have passed since the first of them,
+    so requests never wait on the INSERT or the SQLite write lock. A batch
+    the database rejects is retried one entry at a time. With
+    settings.TEACHER_AUDIT_SYNC entries are written immediately instead,
+    which is what tests want.
+    """
+
+    def __init__(self, batch_size=AUDIT_BATCH_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, entry):
+        if getattr(settings, 'TEACHER_AUDIT_SYNC', False):
+            self.write([entry])
+            return
+        self._ensure_started()
+        self.queue.put(entry)
+
+    def flush(self, timeout=AUDIT_FLUSH_TIMEOUT):
+        """Wait until everything submitted so far has been written
+
+        Returns False, after logging it, if that did not happen within
+        timeout seconds.
+        """
+        if self._thread is None:
+            return True
+        request = _FlushRequest()
+        self.queue.put(request)
+        if not request.done.wait(timeout):
+            logger.warning(
+                "Teacher permission log not drained within %s s; about %d entries still queued",
+                timeout, self.queue.qsize(),
+            )
+            return False
+        return True
+
+    def write(self, entries):
+        try:
+            with transaction.atomic():
+                TeacherPermissionLog.objects.bulk_create(entries)
+        except DatabaseError:
+            if len(entries) == 1:
+                logger.exception("Dropped a teacher permission log entry for teacher %s", entries[0].teacher_id)
+                return
+            # One bad row, such as a deleted teacher, fails the whole INSERT;
+            # retry row by row so only the bad entries are lost
+            for entry in entries:
+                self.write([entry])
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                thread = threading.Thread(target=self._run, name='teacher-audit-writer', daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _collect(self):
+        """Wait for one entry, then gather more until the batch or interval is full"""
+        items = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(items) < self.batch_size and not isinstance(items[-1], _FlushRequest):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            entries = [item for item in items if not isinstance(item, _FlushRequest)]
+            try:
+                if entries:
+                    self.write(entries)
+                    close_old_connections()
+            except Exception:
+                # Anything else must not kill the thread and leave flush() waiting
+                logger.exception("Dropped %d teacher permission log entries", len(entries))
+            finally:
+                for item in items:
+                    if isinstance(item, _FlushRequest):
+                        item.done.set()
+
+
+writer = AuditWriter()
+atexit.register(writer.flush, AUDIT_SHUTDOWN_TIMEOUT)
+
+
+def log_permission_action(teacher_id, action, permission, request=None):
+    """Record that a teacher used permission, off the request path"""
+    writer.submit(TeacherPermissionLog(
+        teacher_id=teacher_id,
+        action=action,
+        permission=permission,
+        ip_address=request.META.get('REMOTE_ADDR') if request is not None else None,
+    ))
+
+
+def archive_path(directory, month):
+    return os.path.join(directory, f'teacher_permission_log-{month}.jsonl.gz')
+
+
+def archive_permission_logs(before, directory, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move log entries older than before into monthly .jsonl.gz files
+
+    Rows are taken oldest first through permlog_timestamp_idx, one batch at
+    a time: the batch is appended to its month's archive, synced to disk,
+    and only then deleted in its own short transaction, so the SQLite write
+    lock is never held for longer than one batch. Appending adds a gzip
+    member, which gzip readers treat as one stream. Returns the number of
+    rows archived per month.
+    """
+    os.makedirs(directory, exist_ok=True)
+    archived = {}
+    old_logs = TeacherPermissionLog.objects.filter(timestamp__lt=before).order_by('timestamp', 'pk')
+    while True:
+        rows = list(old_logs.values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            break
+        by_month = {}
+        for row in rows:
+            month = timezone.localtime(row['timestamp']).strftime('%Y-%m')
+            by_month.setdefault(month, []).append(row)
+        for month, month_rows in by_month.items():
+            with open(archive_path(directory, month), 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+                    for row in month_rows:
+                        archive.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False).encode() + b'\n')
+                raw.flush()
+                os.fsync(raw.fileno())
+            archived[month] = archived.get(month, 0) + len(month_rows)
+        with transaction.atomic():
+            TeacherPermissionLog.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return archived
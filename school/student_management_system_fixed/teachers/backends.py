@@ -0,0 +1,41 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from students.versioning import bump_version, get_version
+
+
+PERMISSIONS_VERSION_KEY = 'teachers:permissions_version'
+PERMISSION_CACHE_TIMEOUT = 60 * 60
+
+
+def permission_cache_key(user_obj):
+    version = get_version(PERMISSIONS_VERSION_KEY)
+    return f'teachers:perms:{user_obj.pk}:{int(user_obj.is_superuser)}:{version}'
+
+
+def invalidate_permission_cache():
+    """Drop every cached permission set; called when groups or grants change"""
+    bump_version(PERMISSIONS_VERSION_KEY)
+
+
+class CachedPermissionBackend(ModelBackend):
+    """ModelBackend whose permission sets are shared across requests
+
+    ModelBackend already memoizes permissions on the user object for one
+    request; this keeps them in the cache under a key holding the user and
+    the permissions version, so warm requests check permissions without a
+    query. Any change to group membership or grants bumps the version (see
+    teachers.signals).
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            key = permission_cache_key(user_obj)
+            perms = cache.get(key)
+            if perms is None:
+                perms = super().get_all_permissions(user_obj)
+                cache.set(key, perms, PERMISSION_CACHE_TIMEOUT)
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
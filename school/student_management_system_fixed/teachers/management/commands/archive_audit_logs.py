@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from teachers.audit import ARCHIVE_BATCH_SIZE, archive_permission_logs
+
+
+class Command(BaseCommand):
+    help = 'Move old TeacherPermissionLog rows into compressed monthly JSONL archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365,
+                            help='Archive entries older than this many days (default: 365)')
+        parser.add_argument('--output-dir', default=str(settings.AUDIT_ARCHIVE_DIR))
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        archived = archive_permission_logs(before, options['output_dir'], batch_size=options['batch_size'])
+        for month, count in sorted(archived.items()):
+            self.stdout.write(f'{month}: {count}')
+        total = sum(archived.values())
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} permission log entries to {options["output_dir"]}.'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 23:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='teacherpermissionlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='الوقت'),
+        ),
+    ]
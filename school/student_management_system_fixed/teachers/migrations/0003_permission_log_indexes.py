@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-17 23:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0002_permission_log_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teacherpermissionlog',
+            index=models.Index(fields=['timestamp'], name='permlog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacherpermissionlog',
+            index=models.Index(fields=['teacher', 'timestamp'], name='permlog_teacher_time_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User, Group, Permission
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.urls import reverse
+from django.utils import timezone
 
 class Department(models.Model):
     """قسم أكاديمي"""
@@ -98,71 +99,101 @@ class Teacher(models.Model):
     def email(self):
         return self.user.email
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rank_key = instance.rank_key
+        return instance
+    
+    @property
+    def rank_key(self):
+        """(user_id, rank) as last synced to the user's groups"""
+        if self.get_deferred_fields() & {'user_id', 'rank'}:
+            return None
+        return (self.user_id, self.rank)
+    
     def save(self, *args, **kwargs):
-        # إنشاء المجموعات والصلاحيات تلقائياً
+        # مزامنة المجموعات فقط عند تغيّر الدرجة العلمية أو الحساب
+        rank_changed = self._state.adding or self.rank_key != getattr(self, '_loaded_rank_key', None)
         super().save(*args, **kwargs)
-        self.assign_permissions()
+        if rank_changed:
+            self.assign_permissions()
+        self._loaded_rank_key = self.rank_key
     
     def assign_permissions(self):
-        """تعيين الصلاحيات حسب الدرجة العلمية"""
-        # إزالة جميع المجموعات السابقة
-        self.user.groups.clear()
-        
-        # تعيين الصلاحيات حسب الدرجة العلمية
-        if self.rank == 'professor':
-            # الأساتذة لديهم جميع الصلاحيات
-            group, created = Group.objects.get_or_create(name='أساتذة')
-            permissions = [
-                'can_view_all_students',
-                'can_edit_student_grades', 
-                'can_generate_reports',
-                'can_manage_department',
-                'can_view_teacher_salaries',
-            ]
-            self._add_permissions_to_group(group, permissions)
-            self.user.groups.add(group)
-            
-        elif self.rank == 'associate_professor':
-            # الأساتذة المشاركون
-            group, created = Group.objects.get_or_create(name='أساتذة مشاركون')
-            permissions = [
-                'can_view_all_students',
-                'can_edit_student_grades',
-                'can_generate_reports',
-                'can_manage_department',
-            ]
-            self._add_permissions_to_group(group, permissions)
-            self.user.groups.add(group)
-            
-        elif self.rank == 'assistant_professor':
-            # الأساتذة المساعدون
-            group, created = Group.objects.get_or_create(name='أساتذة مساعدون')
-            permissions = [
-                'can_view_all_students',
-                'can_edit_student_grades',
-                'can_generate_reports',
-            ]
-            self._add_permissions_to_group(group, permissions)
-            self.user.groups.add(group)
-            
-        else:  # lecturer
-            # المحاضرون
-            group, created = Group.objects.get_or_create(name='محاضرون')
-            permissions = [
-                'can_view_all_students',
-                'can_edit_student_grades',
-            ]
-            self._add_permissions_to_group(group, permissions)
-            self.user.groups.add(group)
-    
-    def _add_permissions_to_group(self, group, permission_codenames):
-        """إضافة صلاحيات إلى المجموعة"""
-        for codename in permission_codenames:
-            try:
-                permission = Permission.objects.get(codename=codename)
-                group.permissions.add(permission)
-            except Permission.DoesNotExist:
-                pass
+        """تعيين الصلاحيات حسب الدرجة العلمية
+
+        Only the difference is written: the user leaves the other rank groups
+        and joins the one for its rank; groups unrelated to ranks are kept.
+        """
+        groups = rank_groups()
+        group_id, _ = groups.get(self.rank, groups['lecturer'])
+        rank_group_ids = {gid for gid, _ in groups.values()}
+        current = set(self.user.groups.values_list('pk', flat=True))
+        stale = (current & rank_group_ids) - {group_id}
+        if stale:
+            self.user.groups.remove(*stale)
+        if group_id not in current:
+            self.user.groups.add(group_id)
+
+# الصلاحيات لكل درجة علمية: (اسم المجموعة، رموز الصلاحيات)
+RANK_PERMISSIONS = {
+    'professor': ('أساتذة', [
+        'can_view_all_students',
+        'can_edit_student_grades',
+        'can_generate_reports',
+        'can_manage_department',
+        'can_view_teacher_salaries',
+    ]),
+    'associate_professor': ('أساتذة مشاركون', [
+        'can_view_all_students',
+        'can_edit_student_grades',
+        'can_generate_reports',
+        'can_manage_department',
+    ]),
+    'assistant_professor': ('أساتذة مساعدون', [
+        'can_view_all_students',
+        'can_edit_student_grades',
+        'can_generate_reports',
+    ]),
+    'lecturer': ('محاضرون', [
+        'can_view_all_students',
+        'can_edit_student_grades',
+    ]),
+}
+
+_rank_groups = {}
+
+def rank_groups():
+    """rank -> (group id, frozenset of permission ids), cached for the process
+
+    Built once with a single codename__in lookup for all permissions. The
+    cached groups are re-checked with one query per use and the map is
+    rebuilt if any of them has been deleted since.
+    """
+    if _rank_groups:
+        group_ids = {group_id for group_id, _ in _rank_groups.values()}
+        if Group.objects.filter(pk__in=group_ids).count() == len(group_ids):
+            return _rank_groups
+
+    codenames = {codename for _, perms in RANK_PERMISSIONS.values() for codename in perms}
+    permission_ids = dict(Permission.objects.filter(
+        content_type__app_label='teachers', codename__in=codenames
+    ).values_list('codename', 'pk'))
+
+    groups = {}
+    for rank, (name, perms) in RANK_PERMISSIONS.items():
+        group, _ = Group.objects.get_or_create(name=name)
+        ids = frozenset(permission_ids[codename] for codename in perms if codename in permission_ids)
+        group.permissions.add(*ids)
+        groups[rank] = (group.pk, ids)
+
+    _rank_groups.clear()
+    _rank_groups.update(groups)
+    return _rank_groups
+
+def clear_rank_groups_cache():
+    _rank_groups.clear()
 
 class Course(models.Model):
     """مقرر دراسي"""
@@ -192,13 +223,18 @@ class TeacherPermissionLog(models.Model):
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, verbose_name="المعلم")
     action = models.CharField(max_length=100, verbose_name="الإجراء")
     permission = models.CharField(max_length=100, verbose_name="الصلاحية")
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name="الوقت")
+    # Set when the entry is queued, not when teachers.audit writes it
+    timestamp = models.DateTimeField(default=timezone.now, verbose_name="الوقت")
     ip_address = models.GenericIPAddressField(blank=True, null=True, verbose_name="عنوان IP")
     
     class Meta:
         verbose_name = "سجل صلاحية"
         verbose_name_plural = "سجلات الصلاحيات"
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp'], name='permlog_timestamp_idx'),
+            models.Index(fields=['teacher', 'timestamp'], name='permlog_teacher_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.teacher.full_name} - {self.action} - {self.timestamp}"
@@ -0,0 +1,33 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from students.thumbnails import queue_thumbnails
+from .backends import invalidate_permission_cache
+from .models import Teacher
+
+
+# Membership and grant changes, whichever side they are made from: Teacher
+# rank syncs, admin group edits and direct user permission edits.
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def permissions_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_permission_cache()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def permission_source_deleted(sender, **kwargs):
+    invalidate_permission_cache()
+
+
+@receiver(post_save, sender=Teacher)
+def photo_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Partial saves that leave the photo alone, like GPA updates, skip this
+    if raw or (update_fields is not None and 'photo' not in update_fields):
+        return
+    if instance.photo:
+        transaction.on_commit(lambda: queue_thumbnails(instance.photo))
@@ -1,3 +1,265 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from students.changelists import CachedCountPaginator
+from students.models import Enrollment, Grade, Student
+from students.tests import make_course, make_student
+from .audit import AuditWriter, archive_path, archive_permission_logs
+from .models import Course, Department, Teacher, TeacherPermissionLog
+from .views import course_roster
+
+
+class TeacherTestCase(TestCase):
+    """One CS professor, whose courses make_course() and make_roster() create"""
+
+    def setUp(self):
+        # Version bumps wait for a commit, which TestCase never makes
+        cache.clear()
+        self.department = Department.objects.create(name='CS', code='CS')
+        self.user = User.objects.create_user('teacher', password='pw')
+        self.teacher = Teacher.objects.create(
+            user=self.user, employee_id='T1', department=self.department, rank='professor',
+            employment_type='full_time', specialization='AI', hire_date=date(2020, 1, 1)
+        )
+
+    def make_roster(self, n):
+        self.course = make_course()
+        students = [make_student(i) for i in range(n)]
+        Enrollment.objects.bulk_create([Enrollment(course=self.course, student=s) for s in students])
+        return students
+
+
+class TeacherRankGroupTests(TeacherTestCase):
+    """Rank groups are synced by difference, and only when the rank changes"""
+
+    def group_names(self):
+        return set(self.user.groups.values_list('name', flat=True))
+
+    def test_new_teacher_joins_rank_group(self):
+        self.assertEqual(self.group_names(), {'أساتذة'})
+        self.assertTrue(User.objects.get(pk=self.user.pk).has_perm('teachers.can_view_teacher_salaries'))
+
+    def test_unrelated_save_skips_sync(self):
+        teacher = Teacher.objects.get(pk=self.teacher.pk)
+        teacher.phone = '0500000000'
+        with self.assertNumQueries(1):
+            teacher.save()
+
+    def test_rank_change_swaps_rank_group_only(self):
+        self.user.groups.add(Group.objects.create(name='مشرفون'))
+        teacher = Teacher.objects.get(pk=self.teacher.pk)
+        teacher.rank = 'lecturer'
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher.save()
+        self.assertEqual(self.group_names(), {'مشرفون', 'محاضرون'})
+        self.assertFalse(User.objects.get(pk=self.user.pk).has_perm('teachers.can_generate_reports'))
+
+
+class CachedPermissionBackendTests(TeacherTestCase):
+    """Warm permission checks cost no queries and follow group changes"""
+
+    def test_warm_check_is_query_free(self):
+        User.objects.get(pk=self.user.pk).has_perm('teachers.can_generate_reports')
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('teachers.can_generate_reports'))
+
+    def test_group_edit_invalidates_cache(self):
+        User.objects.get(pk=self.user.pk).has_perm('teachers.can_generate_reports')
+        with self.captureOnCommitCallbacks(execute=True):
+            Group.objects.get(name='أساتذة').permissions.clear()
+        self.assertFalse(User.objects.get(pk=self.user.pk).has_perm('teachers.can_generate_reports'))
+
+
+@override_settings(TEACHER_AUDIT_SYNC=True)
+class PermissionAuditTests(TeacherTestCase):
+    """Grade edits leave a TeacherPermissionLog entry"""
+
+    def test_grade_edit_is_logged(self):
+        course = make_course()
+        student = make_student()
+        Enrollment.objects.create(course=course, student=student)
+        self.client.force_login(self.user)
+        self.client.post(reverse('course_gradebook', args=[course.pk]), {f'score_{student.pk}': 88})
+        log = TeacherPermissionLog.objects.get()
+        self.assertEqual((log.teacher, log.permission), (self.teacher, 'can_edit_student_grades'))
+
+
+@override_settings(TEACHER_AUDIT_SYNC=True)
+class GradebookTests(TeacherTestCase):
+    """Saving the gradebook upserts one Grade per student and refreshes GPAs"""
+
+    def test_new_and_existing_grades_are_upserted(self):
+        graded, ungraded, blank = self.make_roster(3)
+        Grade.objects.create(student=graded, course=self.course, score=70)
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('course_gradebook', args=[self.course.pk]), {
+            f'score_{graded.pk}': 96, f'score_{ungraded.pk}': 85, f'score_{blank.pk}': '',
+        })
+        self.assertRedirects(response, reverse('course_gradebook', args=[self.course.pk]))
+        scores = dict(Grade.objects.filter(course=self.course).values_list('student', 'score'))
+        self.assertEqual(scores, {graded.pk: Decimal('96'), ungraded.pk: Decimal('85')})
+        gpas = dict(Student.objects.values_list('pk', 'gpa'))
+        self.assertEqual(
+            (gpas[graded.pk], gpas[ungraded.pk], gpas[blank.pk]),
+            (Decimal('4.00'), Decimal('3.50'), Decimal('0.00'))
+        )
+
+    def test_resubmitting_unchanged_scores_writes_nothing(self):
+        student, = self.make_roster(1)
+        Grade.objects.create(student=student, course=self.course, score=80)
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('course_gradebook', args=[self.course.pk]), {f'score_{student.pk}': '80.00'}, follow=True
+        )
+        self.assertEqual([str(m) for m in response.context['messages']], ['تم حفظ 0 درجة بنجاح.'])
+        self.assertEqual(Grade.objects.get().score, Decimal('80'))
+
+
+class CourseRosterTests(TeacherTestCase):
+    """The roster carries each student's score for this course in one query"""
+
+    def test_scores_come_from_this_course_only(self):
+        graded, ungraded = self.make_roster(2)
+        other = make_course('CS102')
+        Grade.objects.create(student=graded, course=self.course, score=91)
+        Grade.objects.create(student=ungraded, course=other, score=60)
+        make_student(9999)
+        with self.assertNumQueries(1):
+            roster = {student.pk: student.course_score for student in course_roster(self.course)}
+        self.assertEqual(roster, {graded.pk: Decimal('91'), ungraded.pk: None})
+
+    def test_course_detail_queries_do_not_grow_with_class_size(self):
+        self.client.force_login(self.user)
+        students = self.make_roster(2)
+        Grade.objects.bulk_create([Grade(student=s, course=self.course, score=77) for s in students])
+        url = reverse('teacher_course_detail', args=[self.course.pk])
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        more = [make_student(100 + i, gender='F', year='2') for i in range(10)]
+        Enrollment.objects.bulk_create([Enrollment(course=self.course, student=s) for s in more])
+        Grade.objects.bulk_create([Grade(student=s, course=self.course, score=88) for s in more])
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(
+            sorted(student.course_score for student in response.context['students_in_course']),
+            [Decimal('77')] * 2 + [Decimal('88')] * 10
+        )
+
+
+class CourseChangelistTests(TeacherTestCase):
+    """Course admin counts are cached and foreign key filters load no choices"""
+
+    def setUp(self):
+        super().setUp()
+        self.math = Department.objects.create(name='Mathematics', code='MATH')
+        make_course()
+        make_course('MATH101', department=self.math)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def test_count_is_cached_per_query_and_version(self):
+        self.assertEqual(CachedCountPaginator(Course.objects.all(), 10).count, 2)
+        make_course('CS102')
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedCountPaginator(Course.objects.all(), 10).count, 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(CachedCountPaginator(Course.objects.all(), 10, version='v2').count, 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(CachedCountPaginator(Course.objects.filter(department=self.math), 10).count, 1)
+
+    def test_department_filter_renders_only_the_selected_row(self):
+        url = reverse('admin:teachers_course_changelist')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        Department.objects.bulk_create([Department(name=f'Unused{i}', code=f'U{i}') for i in range(5)])
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(len(many), len(few))
+        self.assertNotContains(response, 'Unused0')
+
+        response = self.client.get(url, {'department__id__exact': self.math.pk})
+        self.assertEqual([course.code for course in response.context['cl'].result_list], ['MATH101'])
+        self.assertContains(response, f'<option value="{self.math.pk}" selected>{self.math}</option>', html=True)
+        self.assertContains(response, 'name="department__id__exact"')
+
+
+@override_settings(TEACHER_AUDIT_SYNC=False)
+class AuditWriterTests(TransactionTestCase):
+    """The background writer survives failed batches and flush() never hangs
+
+    A TransactionTestCase: the writer thread has its own connection.
+    """
+
+    def entry(self):
+        return TeacherPermissionLog(teacher_id=1, action='a', permission='p')
+
+    def test_failed_batch_does_not_stop_the_writer(self):
+        writer = AuditWriter(flush_interval=0.01)
+        with mock.patch.object(TeacherPermissionLog.objects, 'bulk_create',
+                               side_effect=[RuntimeError('boom'), None]) as bulk_create, \
+                self.assertLogs('teachers.audit', 'ERROR'):
+            writer.submit(self.entry())
+            self.assertTrue(writer.flush())
+            writer.submit(self.entry())
+            self.assertTrue(writer.flush())
+        self.assertEqual(bulk_create.call_count, 2)
+
+    def test_flush_gives_up_after_timeout(self):
+        writer = AuditWriter(flush_interval=0.01)
+        release = threading.Event()
+        with mock.patch.object(TeacherPermissionLog.objects, 'bulk_create', side_effect=lambda entries: release.wait()):
+            writer.submit(self.entry())
+            with self.assertLogs('teachers.audit', 'WARNING'):
+                self.assertFalse(writer.flush(timeout=0.05))
+            release.set()
+            self.assertTrue(writer.flush())
+
+    def test_rejected_batch_is_retried_row_by_row(self):
+        teacher = make_course().teacher
+        entries = [
+            TeacherPermissionLog(teacher_id=teacher_id, action='a', permission='p')
+            for teacher_id in (teacher.pk, teacher.pk + 1000, teacher.pk)
+        ]
+        with self.assertLogs('teachers.audit', 'ERROR') as logs:
+            AuditWriter().write(entries)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(TeacherPermissionLog.objects.filter(teacher=teacher).count(), 2)
+        self.assertEqual(TeacherPermissionLog.objects.count(), 2)
+
+
+class AuditArchiveTests(TeacherTestCase):
+    """Old log entries move to monthly gzip archives in batches"""
+
+    def test_archive_moves_only_old_entries(self):
+        now = timezone.now()
+        TeacherPermissionLog.objects.bulk_create([
+            TeacherPermissionLog(teacher=self.teacher, action='a', permission='p', timestamp=now - timedelta(days=days))
+            for days in (1, 400, 401, 430)
+        ])
+        with tempfile.TemporaryDirectory() as directory:
+            archived = archive_permission_logs(now - timedelta(days=365), directory, batch_size=2)
+            rows = [
+                json.loads(line)
+                for month in archived
+                for line in gzip.open(archive_path(directory, month)).read().splitlines()
+            ]
+            self.assertEqual(len(os.listdir(directory)), len(archived))
+        self.assertEqual(sum(archived.values()), 3)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(TeacherPermissionLog.objects.count(), 1)
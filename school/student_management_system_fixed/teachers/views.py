@@ -5,9 +5,15 @@ from .models import Teacher, Course
 from students.models import Student, Grade
 from django.contrib import messages
 from django.forms import inlineformset_factory
-from students.forms import GradeForm
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from students.forms import GradeForm, GradebookForm
+from students.gpa import recompute_gpa
+from students.decorators import query_budget
+from .audit import log_permission_action
 
 @login_required
+@query_budget(6)
 def teacher_dashboard(request):
     teacher = get_object_or_404(Teacher, user=request.user)
     courses = Course.objects.filter(teacher=teacher)
@@ -17,10 +23,22 @@ def teacher_dashboard(request):
     }
     return render(request, 'teachers/dashboard.html', context)
 
+def course_roster(course):
+    """Enrolled students of a course, each annotated with its course_score
+
+    One query regardless of class size: the grade comes from a correlated
+    subquery instead of a grade_set lookup per student.
+    """
+    score = Grade.objects.filter(student=OuterRef('pk'), course=course).values('score')[:1]
+    return Student.objects.filter(enrollment__course=course).annotate(
+        course_score=Subquery(score)
+    ).order_by('first_name', 'last_name', 'pk')
+
 @login_required
+@query_budget(6)
 def teacher_course_detail(request, course_id):
     course = get_object_or_404(Course, id=course_id, teacher__user=request.user)
-    students_in_course = Student.objects.filter(courses=course)
+    students_in_course = course_roster(course)
     context = {
         'course': course,
         'students_in_course': students_in_course,
@@ -37,6 +55,7 @@ def edit_student_grade(request, student_id, course_id):
         form = GradeForm(request.POST, instance=grade)
         if form.is_valid():
             form.save()
+            log_permission_action(course.teacher_id, 'تعديل درجة', 'can_edit_student_grades', request)
             messages.success(request, 'تم تحديث درجة الطالب بنجاح.')
             return redirect('teacher_course_detail', course_id=course.id)
     else:
@@ -50,5 +69,33 @@ def edit_student_grade(request, student_id, course_id):
     return render(request, 'teachers/edit_grade.html', context)
 
 
+@login_required
+def course_gradebook(request, course_id):
+    course = get_object_or_404(Course, id=course_id, teacher__user=request.user)
+    roster = [(student, student.course_score) for student in course_roster(course)]
 
+    if request.method == 'POST':
+        form = GradebookForm(request.POST, roster=roster)
+        if form.is_valid():
+            scores = form.changed_scores()
+            with transaction.atomic():
+                Grade.objects.bulk_create(
+                    [Grade(student_id=student_id, course=course, score=score)
+                     for student_id, score in scores.items()],
+                    update_conflicts=True,
+                    unique_fields=['student', 'course'],
+                    update_fields=['score'],
+                )
+                # The upsert bypasses the Grade signals
+                recompute_gpa(scores.keys())
+            log_permission_action(course.teacher_id, 'حفظ كشف الدرجات', 'can_edit_student_grades', request)
+            messages.success(request, f'تم حفظ {len(scores)} درجة بنجاح.')
+            return redirect('course_gradebook', course_id=course.id)
+    else:
+        form = GradebookForm(roster=roster)
 
+    context = {
+        'course': course,
+        'form': form,
+    }
+    return render(request, 'teachers/gradebook.html', context)
@@ -0,0 +1,5 @@
+"""Code used by more than one project in this repository
+
+Each project's settings module puts the repository root on sys.path, so
+these modules import as ``shared.<name>``.
+"""
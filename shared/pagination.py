@@ -0,0 +1,143 @@
+"""Keyset (cursor) pagination, shared by student_list and the reverser history"""
+import base64
+import datetime
+import json
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without its millisecond rounding of datetimes
+
+    A cursor must hold the exact stored value: a datetime rounded down sorts
+    before the row it came from, so the seek would repeat or skip rows.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorPage:
+    """One page of a CursorPaginator, iterable like a Paginator page"""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class CursorPaginator:
+    """Keyset paginator: seeks past the last row seen instead of using OFFSET
+
+    Pages are addressed by opaque cursor tokens rather than numbers, so
+    there is no COUNT(*) and page N costs the same as page 1. The ordering
+    is taken from the queryset (or its model's Meta.ordering) and made
+    unique by appending pk. Ordering by an annotation is supported as long
+    as the annotation has a resolvable output_field.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        ordering = list(ordering or queryset.query.order_by or queryset.model._meta.ordering)
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('pk')
+        self.ordering = ordering
+        self.fields = [self.ordering_field(field.lstrip('-')) for field in ordering]
+
+    def ordering_field(self, name):
+        """Model field or annotation output field that values of name are parsed with"""
+        opts = self.queryset.model._meta
+        if name == 'pk':
+            return opts.pk
+        if name in self.queryset.query.annotations:
+            return self.queryset.query.annotations[name].output_field
+        return opts.get_field(name)
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'d': direction, 'v': values}, cls=CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, values = payload['d'], payload['v']
+        except (ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+        if direction not in ('n', 'p') or not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        # Back to Python values (datetimes, decimals, ...) at full precision
+        try:
+            values = [None if value is None else field.to_python(value)
+                      for field, value in zip(self.fields, values)]
+        except ValidationError:
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def _seek(self, values, backwards):
+        """Rows strictly after (or before) values in the paginator's ordering"""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != backwards
+            step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[i]})
+            for prior, value in zip(self.ordering[:i], values):
+                step &= Q(**{prior.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def page(self, cursor=None):
+        """The page after (or before) cursor; the first page when cursor is empty"""
+        direction, values = self.decode_cursor(cursor) if cursor else ('n', None)
+        backwards = direction == 'p'
+        ordering = self.ordering
+        if backwards:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        if not rows:
+            return CursorPage(rows, None, None)
+        has_next = has_more if not backwards else True
+        has_previous = has_more if backwards else values is not None
+        return CursorPage(
+            rows,
+            self.encode_cursor(rows[-1], 'n') if has_next else None,
+            self.encode_cursor(rows[0], 'p') if has_previous else None,
+        )